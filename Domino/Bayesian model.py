@@ -1,12 +1,105 @@
 # Bayesian hierarchical model (PyMC) with a __main__ guard and smoke mode
 import argparse
+import importlib.util
+import os
+import warnings
+from functools import lru_cache
 from multiprocessing import freeze_support
 import numpy as np
 import pandas as pd
-import pymc as pm
-import arviz as az
 from data_simulator import simulate_data
 
+# PyTensor compile modes selectable from the CLI; None keeps PyMC's C default
+BACKEND_MODES = {"c": None, "numba": "NUMBA", "jax": "JAX"}
+# NUTS implementations accepted by pm.sample(nuts_sampler=...)
+NUTS_SAMPLERS = ("numpyro", "nutpie", "pymc")
+
+
+def _select_nuts_sampler(preferred: str = "numpyro") -> str:
+    """Return the preferred NUTS implementation if installed, else the next available one."""
+    for sampler in (preferred, "numpyro", "nutpie"):
+        if sampler == "pymc":
+            break
+        if importlib.util.find_spec(sampler) is not None:
+            return sampler
+    return "pymc"
+
+
+def _resolve_backend_mode(backend: str) -> str | None:
+    """Return the PyTensor compile mode for a backend, falling back to C when numba is missing."""
+    if backend == "numba":
+        try:
+            import numba  # noqa: F401
+        except ImportError:
+            warnings.warn("numba is not installed; falling back to the C backend", RuntimeWarning)
+            return None
+    return BACKEND_MODES[backend]
+
+
+@lru_cache(maxsize=8)
+def _build_model(
+    storm_levels: tuple,
+    polygon_levels: tuple,
+    cov_names: tuple,
+    n_rows: int,
+    likelihood: str,
+    precision: str,
+):
+    """Build the hierarchical model once per data layout.
+
+    Observed data live in pm.Data containers filled with placeholders here;
+    callers swap in real arrays with pm.set_data, so repeated fits (e.g. a
+    power-calculation loop) reuse the same graph instead of rebuilding it.
+    """
+    import pymc as pm
+
+    coords = {
+        "storm": list(storm_levels),
+        "polygon": list(polygon_levels),
+        "covariates": list(cov_names),
+    }
+
+    with pm.Model(coords=coords) as model:
+        # hyperpriors
+        sigma_storm = pm.Exponential("sigma_storm", 1.0)
+        sigma_polygon = pm.Exponential("sigma_polygon", 1.0)
+        sigma_obs = pm.Exponential("sigma_obs", 1.0)
+
+        # data containers (placeholders until pm.set_data)
+        storm_idx = pm.Data("storm_idx", np.zeros(n_rows, dtype=np.int32))
+        polygon_idx = pm.Data("polygon_idx", np.zeros(n_rows, dtype=np.int32))
+        X = pm.Data("X", np.zeros((n_rows, len(cov_names)), dtype=precision))
+        t_arr = pm.Data("t", np.zeros(n_rows, dtype=precision))
+        y_obs = pm.Data("y_obs", np.zeros(n_rows, dtype=precision))
+
+        # random effects, non-centered to avoid the funnel between effects and their scales
+        a_storm_raw = pm.Normal("a_storm_raw", mu=0.0, sigma=1.0, dims="storm")
+        a_storm = pm.Deterministic("a_storm", sigma_storm * a_storm_raw, dims="storm")
+        a_polygon_raw = pm.Normal("a_polygon_raw", mu=0.0, sigma=1.0, dims="polygon")
+        a_polygon = pm.Deterministic("a_polygon", sigma_polygon * a_polygon_raw, dims="polygon")
+
+        # covariate coefficients
+        beta_cov = pm.Normal("beta_cov", mu=0.0, sigma=1.0, shape=len(cov_names))
+
+        # treatment effect (primary parameter)
+        beta_t = pm.Normal("beta_t", mu=0.0, sigma=1.0)
+
+        # linear predictor
+        mu = (a_storm[storm_idx] + a_polygon[polygon_idx]
+              + pm.math.dot(X, beta_cov)
+              + beta_t * t_arr)
+
+        # observation model (robust or normal)
+        if likelihood == "student_t":
+            nu = pm.Exponential("nu", 1/10)
+            pm.StudentT("y_like", mu=mu, sigma=sigma_obs, nu=nu, observed=y_obs)
+        elif likelihood == "normal":
+            pm.Normal("y_like", mu=mu, sigma=sigma_obs, observed=y_obs)
+        else:
+            raise ValueError(f"Unsupported likelihood: {likelihood}")
+
+    return model
+
 
 def run_model(
     smoke: bool = False,
@@ -16,7 +109,12 @@ def run_model(
     likelihood: str = "student_t",
     covariates_to_use: list[str] | None = None,
     optimize_only: bool = False,
-    init_with_map: bool = False,
+    init_with_vi: bool = False,
+    backend: str = "numba",
+    nuts_sampler: str = "numpyro",
+    precision: str = "float32",
+    data: pd.DataFrame | None = None,
+    init_with_map: bool | None = None,
 ):
     """Build, optimize, and sample the model.
 
@@ -24,20 +122,49 @@ def run_model(
         smoke: If True, use a much faster sampling configuration.
         save_plot: If provided, save posterior plot to this path (non-blocking).
         show_plot: If True, display plot interactively (may block).
-        seed: Random seed for reproducibility.
+        seed: Random seed for reproducibility of both the simulated data and sampling.
         likelihood: Likelihood distribution ('student_t' or 'normal').
         covariates_to_use: Specific covariates to include. Defaults to all 'x*' columns.
         optimize_only: If True, find the MAP estimate and exit without sampling.
-        init_with_map: If True, find MAP and use it to initialize the sampler.
+        init_with_vi: If True, fit ADVI and draw one starting point per chain from it.
+        backend: PyTensor compile backend for the logp graph ('c', 'numba' or 'jax').
+        nuts_sampler: Preferred NUTS implementation ('numpyro', 'nutpie' or 'pymc');
+            falls back to whichever is installed.
+        precision: Floating-point dtype for the data and log-density ('float32' or 'float64').
+        data: Pre-simulated or observed data in the simulate_data layout. Defaults to
+            simulating a fresh dataset; passing replicates of the same shape reuses the
+            cached model graph and only swaps its data containers.
+        init_with_map: Deprecated alias for init_with_vi.
     Returns:
         trace: ArviZ InferenceData or Dict with MAP estimate
     """
+    if init_with_map is not None:
+        warnings.warn(
+            "init_with_map is deprecated; use init_with_vi instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        init_with_vi = init_with_map
+
+    # Heavy imports are deferred so --help and argument errors return immediately
+    import pymc as pm
+    import pytensor
+
+    if precision not in ("float32", "float64"):
+        raise ValueError(f"Unsupported precision: {precision}")
+    # Must be set before the graph is built so priors and data share one dtype
+    pytensor.config.floatX = precision
+    pytensor.config.warn_float64 = "ignore"
+
     # Generate or load data
-    df = simulate_data()
+    df = simulate_data(seed=seed) if data is None else data
 
-    # small constant to stabilize log
+    # small constant to stabilize log; transform in place on a single private buffer
     eps = 1e-3
-    df['y_obs'] = np.log(df['y'].clip(lower=eps) + eps)
+    y_obs = df['y'].to_numpy(dtype=precision, copy=True)
+    np.maximum(y_obs, eps, out=y_obs)
+    y_obs += eps
+    np.log(y_obs, out=y_obs)
 
     all_covariates = [c for c in df.columns if c.startswith('x')]
     if covariates_to_use is None:
@@ -48,48 +175,35 @@ def run_model(
         if invalid_covs:
             raise ValueError(f"Invalid covariates specified: {invalid_covs}")
 
-    coords = {
-        "storm": df['storm_id'].unique(),
-        "polygon": df['polygon_id'].unique(),
-        "covariates": covariates_to_use,
-    }
+    # Integer group codes, computed once; factorize keeps first-appearance order like unique()
+    storm_codes, storm_levels = pd.factorize(df['storm_id'])
+    polygon_codes, polygon_levels = pd.factorize(df['polygon_id'])
 
-    draws, tune, chains, target_accept = (200, 200, 2, 0.90) if smoke else (2000, 1000, 4, 0.95)
+    if backend not in BACKEND_MODES:
+        raise ValueError(f"Unsupported backend: {backend}")
+    if nuts_sampler not in NUTS_SAMPLERS:
+        raise ValueError(f"Unsupported NUTS sampler: {nuts_sampler}")
 
-    with pm.Model(coords=coords) as model:
-        # hyperpriors
-        sigma_storm = pm.Exponential("sigma_storm", 1.0)
-        sigma_polygon = pm.Exponential("sigma_polygon", 1.0)
-        sigma_obs = pm.Exponential("sigma_obs", 1.0)
-
-        # random effects
-        storm_idx = pd.Categorical(df['storm_id'], categories=coords['storm']).codes
-        polygon_idx = pd.Categorical(df['polygon_id'], categories=coords['polygon']).codes
+    draws, tune, chains, target_accept = (200, 200, 2, 0.90) if smoke else (2000, 1000, 4, 0.90)
 
-        a_storm = pm.Normal("a_storm", mu=0.0, sigma=sigma_storm, dims="storm")
-        a_polygon = pm.Normal("a_polygon", mu=0.0, sigma=sigma_polygon, dims="polygon")
-
-        # covariate coefficients
-        cov_names = coords['covariates']
-        beta_cov = pm.Normal("beta_cov", mu=0.0, sigma=1.0, shape=len(cov_names))
-
-        # treatment effect (primary parameter)
-        beta_t = pm.Normal("beta_t", mu=0.0, sigma=1.0)
-
-        # linear predictor
-        X = df[cov_names].values
-        mu = (a_storm[storm_idx] + a_polygon[polygon_idx]
-              + (X * beta_cov).sum(axis=1)
-              + beta_t * df['t'].values)
+    # Reuse the graph across calls with the same layout; only the data containers change
+    model = _build_model(
+        tuple(storm_levels),
+        tuple(polygon_levels),
+        tuple(covariates_to_use),
+        len(df),
+        likelihood,
+        precision,
+    )
 
-        # observation model (robust or normal)
-        if likelihood == "student_t":
-            nu = pm.Exponential("nu", 1/10)
-            y_like = pm.StudentT("y_like", mu=mu, sigma=sigma_obs, nu=nu, observed=df['y_obs'].values)
-        elif likelihood == "normal":
-            y_like = pm.Normal("y_like", mu=mu, sigma=sigma_obs, observed=df['y_obs'].values)
-        else:
-            raise ValueError(f"Unsupported likelihood: {likelihood}")
+    with model:
+        pm.set_data({
+            "storm_idx": np.ascontiguousarray(storm_codes, dtype=np.int32),
+            "polygon_idx": np.ascontiguousarray(polygon_codes, dtype=np.int32),
+            "X": np.ascontiguousarray(df[covariates_to_use].to_numpy(dtype=precision)),
+            "t": df['t'].to_numpy(dtype=precision),
+            "y_obs": y_obs,
+        })
 
         # --- Optimization Mode ---
         if optimize_only:
@@ -100,20 +214,45 @@ def run_model(
 
         # --- Initialization for Sampler ---
         initvals = None
-        if init_with_map:
-            print("Finding MAP estimate to initialize sampler...")
-            initvals = pm.find_MAP()
+        if init_with_vi:
+            # Per-chain draws from a cheap variational fit start chains near the typical
+            # set, shortening burn-in more than a single MAP point would
+            print("Fitting ADVI approximation to initialize sampler...")
+            approx = pm.fit(method="advi", n=10000, progressbar=False, random_seed=seed)
+            draws_vi = approx.sample(chains, return_inferencedata=False)
+            initvals = [
+                {rv.name: draws_vi.point(i)[rv.name] for rv in model.free_RVs}
+                for i in range(chains)
+            ]
 
         # --- Sampling Mode ---
+        # nutpie/numpyro compile their own kernels; compile_kwargs only steers PyMC's NUTS
+        nuts_sampler = _select_nuts_sampler(nuts_sampler)
+        sample_kwargs = {}
+        if nuts_sampler == "numpyro":
+            # Vectorized chains share one device, batching every chain's gradient into one XLA call
+            sample_kwargs["nuts_sampler_kwargs"] = {"chain_method": "vectorized"}
+        elif nuts_sampler == "pymc":
+            compile_mode = _resolve_backend_mode(backend)
+            if compile_mode is not None:
+                sample_kwargs["compile_kwargs"] = {"mode": compile_mode}
+
+        # Chains are independent, so run one process per chain (freeze_support guards spawn)
         trace = pm.sample(
             draws=draws,
             tune=tune,
             chains=chains,
+            cores=min(chains, os.cpu_count() or 1),
             target_accept=target_accept,
             random_seed=seed,
             initvals=initvals,
+            nuts_sampler=nuts_sampler,
+            **sample_kwargs,
         )
 
+    # ArviZ (and the plotting stack it drags in) is only needed once there is a trace
+    import arviz as az
+
     # Summaries (print to console)
     summary = az.summary(trace, var_names=["beta_t", "beta_cov", "sigma_obs", "sigma_storm", "sigma_polygon"])
     try:
@@ -168,9 +307,29 @@ if __name__ == "__main__":
         help="Find the MAP estimate (optimization) and exit without sampling."
     )
     parser.add_argument(
+        "--init-with-vi",
         "--init-with-map",
+        dest="init_with_vi",
         action="store_true",
-        help="Initialize sampler with the MAP estimate to improve convergence."
+        help="Initialize each chain from an ADVI approximation to shorten burn-in."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKEND_MODES),
+        default="numba",
+        help="PyTensor compile backend for the model log-density."
+    )
+    parser.add_argument(
+        "--nuts-sampler",
+        choices=NUTS_SAMPLERS,
+        default="numpyro",
+        help="Preferred NUTS implementation; falls back to whichever is installed."
+    )
+    parser.add_argument(
+        "--precision",
+        choices=["float32", "float64"],
+        default="float32",
+        help="Floating-point precision for the data and model log-density."
     )
 
     args = parser.parse_args()
@@ -186,5 +345,8 @@ if __name__ == "__main__":
         likelihood=args.likelihood,
         covariates_to_use=covs,
         optimize_only=args.optimize_only,
-        init_with_map=args.init_with_map,
+        init_with_vi=args.init_with_vi,
+        backend=args.backend,
+        nuts_sampler=args.nuts_sampler,
+        precision=args.precision,
     )
\ No newline at end of file
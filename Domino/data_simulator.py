@@ -3,19 +3,21 @@ import numpy as np
 import pandas as pd
 
 def simulate_data(n_events=60, polygons_per_event=3, baseline_mean=100, sd_within=80,
-                  treatment_effect=-0.15, intrastorm_sd=30):
-    rows = []
-    for s in range(n_events):
-        for p in range(polygons_per_event):
-            # randomize treatment at storm-level block or polygon-level
-            t = np.random.choice([0,1])  # adapt to block design
-            storm_noise = np.random.normal(0, intrastorm_sd)
-            y = np.random.normal(baseline_mean*(1 + storm_noise/100.0), sd_within)
-            y = max(y, 0.0)
-            if t == 1:
-                y = y * (1 + treatment_effect)
-            rows.append({'storm_id': s, 'polygon_id': f"{s}_{p}", 't': t, 'y': y, 'x1': np.random.normal()})
-    return pd.DataFrame(rows)
+                  treatment_effect=-0.15, intrastorm_sd=30, seed=None):
+    # Draw every row at once and build the frame from column arrays
+    n = n_events * polygons_per_event
+    rng = np.random.default_rng(seed)
+    storm_id = np.repeat(np.arange(n_events), polygons_per_event)
+    polygon = np.tile(np.arange(polygons_per_event), n_events)
+    # randomize treatment at storm-level block or polygon-level
+    t = rng.integers(0, 2, size=n)  # adapt to block design
+    storm_noise = rng.normal(0, intrastorm_sd, size=n)
+    y = rng.normal(baseline_mean*(1 + storm_noise/100.0), sd_within)
+    np.maximum(y, 0.0, out=y)
+    y *= np.where(t == 1, 1 + treatment_effect, 1.0)
+    polygon_id = np.char.add(np.char.add(storm_id.astype(str), "_"), polygon.astype(str))
+    return pd.DataFrame({'storm_id': storm_id, 'polygon_id': polygon_id, 't': t, 'y': y,
+                         'x1': rng.normal(size=n)})
 
 # perform many simulations, fit simplified model (e.g. with PyMC or a frequentist mixed model),
 # and compute proportion of sims where posterior CI excludes 0 or p-value < 0.05.
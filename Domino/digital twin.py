@@ -1,19 +1,58 @@
 import json
+import os
 
-# Initialize avatar's memory (stored in a file)
+MEMORY_FILE = "avatar_memory.json"
+# Interactions are appended here and folded into MEMORY_FILE once enough pile up
+EVENT_LOG = "avatar_memory.log"
+COMPACT_AFTER_EVENTS = 100
+
+def apply_event(memory, event):
+    """Fold a single logged event into the in-memory state."""
+    interest = event.get("interest")
+    if interest:
+        memory["user_interests"].add(interest)
+    memory["tasks_completed"] += event.get("tasks_completed", 0)
+
+# Initialize avatar's memory (snapshot file plus any events logged since)
 def load_memory():
     try:
-        with open("avatar_memory.json", "r") as file:
-            return json.load(file)
+        with open(MEMORY_FILE, "r") as file:
+            memory = json.load(file)
     except FileNotFoundError:
-        return {"user_interests": [], "tasks_completed": 0}
+        memory = {"user_interests": [], "tasks_completed": 0}
+    # JSON list on disk, set in memory for O(1) membership checks
+    memory["user_interests"] = set(memory.get("user_interests", []))
 
-def save_memory(memory):
+    replayed = 0
     try:
-        with open("avatar_memory.json", "w") as file:
-            json.dump(memory, file)
-    except Exception as e:
-        print(f"Error saving memory: {e}")
+        with open(EVENT_LOG, "r") as log:
+            for line in log:
+                try:
+                    apply_event(memory, json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn final line from an interrupted write
+                replayed += 1
+    except FileNotFoundError:
+        pass
+
+    if replayed >= COMPACT_AFTER_EVENTS:
+        save_memory(memory)
+    return memory
+
+def log_event(memory, event):
+    """Apply an event and append it to the log; cost is independent of history size."""
+    apply_event(memory, event)
+    with open(EVENT_LOG, "a") as log:
+        log.write(json.dumps(event) + "\n")
+
+def save_memory(memory):
+    """Write a full snapshot atomically and drop the events it now contains."""
+    tmp_path = MEMORY_FILE + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump({**memory, "user_interests": sorted(memory["user_interests"])}, file)
+    os.replace(tmp_path, MEMORY_FILE)
+    if os.path.exists(EVENT_LOG):
+        os.remove(EVENT_LOG)
 
 # Avatar interaction
 def avatar_interact():
@@ -31,7 +70,7 @@ def avatar_interact():
         print("Input interrupted, defaulting to 'coding'.")
     
     if interest and interest not in memory["user_interests"]:
-        memory["user_interests"].append(interest)
+        log_event(memory, {"interest": interest})
         print(f"Cool! I learned you like {interest}.")
     
     # Suggest a task to boost intelligence
@@ -44,8 +83,7 @@ def avatar_interact():
     print(f"Task to grow your skills: {task}")
     
     # Update memory
-    memory["tasks_completed"] += 1
-    save_memory(memory)
+    log_event(memory, {"tasks_completed": 1})
     print(f"You’ve completed {memory['tasks_completed']} tasks with me!")
 
 # Run the avatar with error handling
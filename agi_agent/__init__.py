@@ -3,21 +3,24 @@ AGI Agent - A general-purpose artificial general intelligence agent
 capable of completing complex tasks and inventing solutions.
 """
 
+import importlib
+
 __version__ = "0.1.0"
 __author__ = "AGI Agent Development Team"
 
-from .core.reasoning_engine import ReasoningEngine
-from .core.task_planner import TaskPlanner
-from .core.knowledge_manager import KnowledgeManager
-from .core.tool_integration import ToolIntegrationFramework
-from .core.learning_system import LearningSystem
-from .core.safety_controller import SafetyController
-from .interfaces.communication import CommunicationInterface
-<<<<<<< HEAD
-from .agent import AGIAgent, AgentConfig
-=======
-from .agent import XingAgent as AGIAgent, AgentConfig
->>>>>>> 292dbc9281e467c642f4e5acecc3190f26716a75
+# Public names are resolved on first access (PEP 562) so that importing the
+# package does not pull in every subsystem and its dependencies up front.
+_LAZY_IMPORTS = {
+    "ReasoningEngine": ".core.reasoning_engine",
+    "TaskPlanner": ".core.task_planner",
+    "KnowledgeManager": ".core.knowledge_manager",
+    "ToolIntegrationFramework": ".core.tool_integration",
+    "LearningSystem": ".core.learning_system",
+    "SafetyController": ".core.safety_controller",
+    "CommunicationInterface": ".interfaces.communication",
+    "AGIAgent": ".agent",
+    "AgentConfig": ".agent",
+}
 
 __all__ = [
     "ReasoningEngine",
@@ -28,9 +31,18 @@ __all__ = [
     "SafetyController",
     "CommunicationInterface",
     "AGIAgent",
-<<<<<<< HEAD
-    "AgentConfig"
-=======
     "AgentConfig",
->>>>>>> 292dbc9281e467c642f4e5acecc3190f26716a75
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -138,7 +138,7 @@ class AGIAgent:
                 execution_plan=execution_plan,
                 metadata={
                     "reasoning_steps": len(execution_plan.steps),
-                    "tools_used": list(result.get("tools_used", [])),
+                    "tools_used": list(result["tools_used"]),
                     "safety_checks": result.get("safety_checks", 0)
                 }
             )
@@ -172,40 +172,106 @@ class AGIAgent:
         return task
     
     async def _execute_plan(self, execution_plan) -> Dict[str, Any]:
-        """Execute the planned steps."""
-        results = []
+        """Execute the planned steps, running independent steps concurrently."""
+        steps = execution_plan.steps
+        # Results are slotted by plan position so they stay in plan order across levels
+        positions = {step.id: index for index, step in enumerate(steps)}
+        results = [None] * len(steps)
+        skipped = 0
         tools_used = set()
         safety_checks = 0
         
-        for step in execution_plan.steps:
-            # Safety check before execution
-            safety_result = await self.safety_controller.check_action(step)
-            safety_checks += 1
+        levels = self._planned_levels(execution_plan) or self._dependency_levels(steps)
+        for level in levels:
+            # Steps in a level only depend on earlier levels, so their safety
+            # checks and executions can overlap
+            outcomes = await asyncio.gather(
+                *(self._check_and_execute_step(step) for step in level),
+                return_exceptions=True
+            )
             
-            if not safety_result.approved:
-                if safety_result.requires_human_approval:
-                    # Request human approval
-                    approval = await self._request_human_approval(step, safety_result.reason)
-                    if not approval:
-                        continue
-                else:
-                    self.logger.warning(f"Action blocked by safety controller: {safety_result.reason}")
+            for step, outcome in zip(level, outcomes):
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                safety_checks += 1
+                
+                if outcome is None:
+                    skipped += 1
                     continue
-            
-            # Execute the step
-            step_result = await self._execute_step(step)
-            results.append(step_result)
-            
-            if step.tool_name:
-                tools_used.add(step.tool_name)
+                
+                results[positions[step.id]] = outcome
+                if step.tool_name:
+                    tools_used.add(step.tool_name)
+        
+        if skipped:
+            results = [result for result in results if result is not None]
         
         return {
             "results": results,
-            "tools_used": tools_used,
+            "tools_used": frozenset(tools_used),
             "safety_checks": safety_checks,
             "success": True
         }
     
+    @staticmethod
+    def _planned_levels(execution_plan) -> Optional[List[List[Any]]]:
+        """Levels the planner computed for the plan, if they still cover exactly its steps."""
+        layers = execution_plan.execution_layers
+        steps = execution_plan.steps
+        if not layers or sum(map(len, layers)) != len(steps):
+            return None
+        
+        steps_by_id = {step.id: step for step in steps}
+        if len(steps_by_id) != len(steps):
+            return None
+        try:
+            return [[steps_by_id[step_id] for step_id in layer] for layer in layers]
+        except KeyError:
+            return None
+    
+    @staticmethod
+    def _dependency_levels(steps) -> List[List[Any]]:
+        """Group steps into levels whose members depend only on earlier levels."""
+        step_ids = {step.id for step in steps}
+        done = set()
+        remaining = list(steps)
+        levels = []
+        
+        while remaining:
+            level = [
+                step for step in remaining
+                if all(dep_id in done or dep_id not in step_ids for dep_id in step.depends_on)
+            ]
+            if not level:
+                # Circular dependencies: run what is left one step at a time in plan order
+                levels.extend([step] for step in remaining)
+                break
+            
+            levels.append(level)
+            done.update(step.id for step in level)
+            remaining = [step for step in remaining if step.id not in done]
+        
+        return levels
+    
+    async def _check_and_execute_step(self, step) -> Optional[Dict[str, Any]]:
+        """Run the safety check for a step and execute it if allowed.
+        
+        Returns None when the step is blocked or approval is denied.
+        """
+        safety_result = await self.safety_controller.check_action(step)
+        
+        if not safety_result.approved:
+            if safety_result.requires_human_approval:
+                # Request human approval
+                approval = await self._request_human_approval(step, safety_result.reason)
+                if not approval:
+                    return None
+            else:
+                self.logger.warning(f"Action blocked by safety controller: {safety_result.reason}")
+                return None
+        
+        return await self._execute_step(step)
+    
     async def _execute_step(self, step) -> Dict[str, Any]:
         """Execute a single step in the plan."""
         if step.tool_name:
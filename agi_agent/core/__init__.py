@@ -2,12 +2,17 @@
 Core components of the AGI Agent.
 """
 
-from .reasoning_engine import ReasoningEngine
-from .task_planner import TaskPlanner
-from .knowledge_manager import KnowledgeManager
-from .tool_integration import ToolIntegrationFramework
-from .learning_system import LearningSystem
-from .safety_controller import SafetyController
+import importlib
+
+# Resolved on first access (PEP 562); see agi_agent/__init__.py
+_LAZY_IMPORTS = {
+    "ReasoningEngine": ".reasoning_engine",
+    "TaskPlanner": ".task_planner",
+    "KnowledgeManager": ".knowledge_manager",
+    "ToolIntegrationFramework": ".tool_integration",
+    "LearningSystem": ".learning_system",
+    "SafetyController": ".safety_controller",
+}
 
 __all__ = [
     "ReasoningEngine",
@@ -17,3 +22,16 @@ __all__ = [
     "LearningSystem",
     "SafetyController"
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -4,16 +4,37 @@ Provides local AI model capabilities using Hugging Face transformers.
 """
 
 import asyncio
+import concurrent.futures
+import hashlib
+import importlib.util
 import logging
-from typing import Dict, List, Any, Optional, Union
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Any, Optional, Union
 import json
 import re
-import sys
 import os
 
-# Add parent directory to path to import model_config
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from model_config import ModelConfig
+from ..model_config import ModelConfig
+
+# Heavy dependencies are optional; without them the provider uses a simple local generator
+try:
+    import torch  # type: ignore
+    from transformers import (  # type: ignore
+        AutoModelForCausalLM,
+        AutoTokenizer,
+        BitsAndBytesConfig,
+        DynamicCache,
+        GenerationConfig,
+        TextIteratorStreamer,
+    )
+    _HAS_TORCH = True
+except ImportError:
+    torch = None  # type: ignore
+    _HAS_TORCH = False
+
+# Leftover special-token markup (<|...|>) and bracketed spans, stripped in one pass
+_MARKUP_RE = re.compile(r"<\|.*?\|>|\[.*?\]")
+_WHITESPACE_RE = re.compile(r"\s+")
 
 
 class CustomModelProvider:
@@ -22,22 +43,35 @@ class CustomModelProvider:
     Supports various open-source models like Llama, Mistral, etc.
     """
     
-    def __init__(self, model_name: str = "auto", device: str = "auto"):
+    def __init__(self, model_name: str = "auto", device: str = "auto",
+                 compile_model: Optional[bool] = None, quantization: Optional[str] = "auto"):
         """
         Initialize the custom model provider.
 
         Args:
             model_name: Name of the Hugging Face model to use, or "auto" for smart selection
             device: Device to run the model on ('cpu', 'cuda', 'mps', or 'auto')
+            compile_model: Compile the model with torch.compile after loading.
+                Defaults to compiling only on CUDA, where CUDA graphs repay the compile time.
+            quantization: Load weights with bitsandbytes on CUDA: 'nf4', 'int4', 'int8',
+                None to disable, or 'auto' to use nf4 only when the fp16 weights
+                would not fit in free VRAM.
         """
         self.device = self._get_device(device)
         self.model_name = self._select_model(model_name)
+        self.compile_model = self.device == "cuda" if compile_model is None else compile_model
+        self.quantization = quantization
+        # Set once compilation succeeds on CUDA: fixed-size KV cache for graph replay
+        self.use_static_cache = False
         self.logger = logging.getLogger(__name__)
 
         # Model components
         self.tokenizer = None
         self.model = None
         self.pipeline = None
+        self.dtype = None
+        # Set while the small distilgpt2 model stands in for the requested one
+        self._is_fallback = False
 
         # Get model configuration
         self.model_config = ModelConfig.get_model_info(self.model_name)
@@ -48,6 +82,30 @@ class CustomModelProvider:
         self.top_p = 0.9
         self.do_sample = True
 
+        # LRU of per-conversation KV caches: conversation_id -> (cache, token ids it covers).
+        # Each entry holds a full KV cache on the device, so only the most recent few are kept
+        self.conversation_cache_size = 8
+        self._conversation_caches: "OrderedDict[str, Any]" = OrderedDict()
+
+        # GenerationConfig objects keyed by (temperature, top_p, do_sample, max_new_tokens, static_cache)
+        self._generation_configs: Dict[Any, Any] = {}
+
+        # LRU of responses to deterministic (greedy) one-shot prompts
+        self.response_cache_size = 1024
+        self._response_cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+        # All generation runs on one dedicated thread so concurrent requests queue
+        # instead of oversubscribing the CPU alongside torch's own thread pool
+        self._gen_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="llm-gen"
+        )
+
+        # Micro-batching of concurrent one-shot requests into a single generate()
+        self.max_batch_size = self.model_config.get("max_batch_size", 8)
+        self.batch_wait_timeout_s = 0.01
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_worker: Optional[asyncio.Task] = None
+
         self.logger.info(f"Selected model: {self.model_name} on device: {self.device}")
 
         # Initialize the model
@@ -67,18 +125,22 @@ class CustomModelProvider:
     
     def _initialize_model(self):
         """Initialize the tokenizer and model."""
-        try:
-            # Import heavy dependencies lazily so module import doesn't fail
-            import torch  # type: ignore
-            from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline  # type: ignore
+        if not _HAS_TORCH:
+            self.logger.warning(
+                "torch/transformers not installed. Falling back to simple local generator."
+            )
+            self.pipeline = self._simple_pipeline()
+            return
 
+        try:
             self.logger.info(f"Loading model: {self.model_name} on {self.device}")
 
             # Load tokenizer
             self.tokenizer = AutoTokenizer.from_pretrained(
                 self.model_name,
                 trust_remote_code=True,
-                padding_side="left"
+                padding_side="left",
+                truncation_side="left"
             )
 
             # Add pad token if it doesn't exist
@@ -86,25 +148,35 @@ class CustomModelProvider:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
 
             # Load model
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
-                trust_remote_code=True,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                device_map="auto" if self.device == "cuda" else None,
-                low_cpu_mem_usage=True
-            )
-
-            if self.device != "cuda":
-                self.model = self.model.to(self.device)
-
-            # Create text generation pipeline
-            self.pipeline = pipeline(
-                "text-generation",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if self.device == "cuda" else -1,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
-            )
+            self.dtype = self._select_dtype()
+            quantization_config = self._get_quantization_config()
+            load_kwargs = {"quantization_config": quantization_config} if quantization_config else {}
+            if self.device == "cuda":
+                torch.backends.cuda.enable_flash_sdp(True)
+            for attn_implementation in self._attention_backends():
+                try:
+                    self.model = self._from_pretrained(
+                        self.model_name,
+                        trust_remote_code=True,
+                        torch_dtype=self.dtype,
+                        low_cpu_mem_usage=True,
+                        attn_implementation=attn_implementation,
+                        **load_kwargs
+                    )
+                    break
+                except (ImportError, ValueError) as e:
+                    # Architecture or install doesn't support this backend; try the next one
+                    if attn_implementation == "eager":
+                        raise
+                    self.logger.info(f"Attention backend {attn_implementation} unavailable ({e})")
+            self.logger.info(f"Using {attn_implementation} attention")
+
+            if self.device == "cpu":
+                # Leave cores for the event loop and the rest of the agent
+                torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+
+            if self.compile_model:
+                self._compile_model()
 
             self.logger.info("Model loaded successfully")
 
@@ -128,32 +200,163 @@ class CustomModelProvider:
                 self.model = None
                 self.pipeline = self._simple_pipeline()
 
+    def _from_pretrained(self, model_name: str, **kwargs):
+        """Load a model straight onto self.device.
+
+        Weights come from memory-mapped safetensors when the checkpoint has
+        them, falling back to pickled .bin files. With accelerate installed
+        a device_map places each tensor directly on the target device;
+        otherwise the model is loaded on the host and moved afterwards.
+        """
+        has_accelerate = importlib.util.find_spec("accelerate") is not None
+        if has_accelerate:
+            kwargs["device_map"] = "auto" if self.device == "cuda" else {"": self.device}
+
+        try:
+            model = AutoModelForCausalLM.from_pretrained(model_name, use_safetensors=True, **kwargs)
+        except OSError as e:
+            self.logger.info(f"No safetensors weights for {model_name} ({e}); loading .bin checkpoint")
+            model = AutoModelForCausalLM.from_pretrained(model_name, **kwargs)
+
+        return model if has_accelerate else model.to(self.device)
+
+    def _attention_backends(self) -> List[str]:
+        """Attention implementations to try, fastest first."""
+        backends = ["sdpa", "eager"]
+        if self.device == "cuda" and importlib.util.find_spec("flash_attn") is not None:
+            backends.insert(0, "flash_attention_2")
+        return backends
+
+    def _select_dtype(self):
+        """Pick the weight dtype: fp16 on CUDA, bf16 on CPUs with native bf16 matmuls, else fp32."""
+        if self.device == "cuda":
+            return torch.float16
+        if self.device == "cpu" and getattr(torch.cpu, "_is_avx512_bf16_supported", lambda: False)():
+            return torch.bfloat16
+        return torch.float32
+
+    def _get_quantization_config(self):
+        """Build a BitsAndBytesConfig for the requested quantization, or None."""
+        quantization = self.quantization
+        if quantization == "auto":
+            quantization = "nf4" if self._fp16_exceeds_free_vram() else None
+        if not quantization or self.device != "cuda":
+            return None
+
+        if importlib.util.find_spec("bitsandbytes") is None:
+            self.logger.warning("bitsandbytes not installed; loading %s unquantized", self.model_name)
+            return None
+
+        self.logger.info(f"Quantizing weights with bitsandbytes ({quantization})")
+        if quantization == "int8":
+            return BitsAndBytesConfig(load_in_8bit=True)
+        if quantization in ("int4", "nf4"):
+            return BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=torch.float16,
+                bnb_4bit_use_double_quant=True,
+                bnb_4bit_quant_type="nf4"
+            )
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    def _fp16_exceeds_free_vram(self) -> bool:
+        """Check whether the model's listed size would not fit in free GPU memory."""
+        if self.device != "cuda":
+            return False
+        match = re.match(r"([\d.]+)\s*([MG])B", self.model_config.get("size", ""))
+        if not match:
+            return False
+        size_bytes = float(match.group(1)) * (1e9 if match.group(2) == "G" else 1e6)
+        try:
+            free_bytes, _ = torch.cuda.mem_get_info()
+        except Exception:
+            return False
+        return size_bytes > free_bytes
+
+    def _compile_model(self):
+        """Compile the model with TorchInductor, warming it up once.
+
+        When the decoder stack can be found, only the feed-forward sub-module
+        of each block is compiled in place. The MLPs are identical across
+        blocks and never touch the KV cache or per-layer indices, so a single
+        graph serves every layer while attention, caching and generate()'s
+        Python control flow stay eager. Otherwise ``forward`` is compiled as a
+        whole (the module itself is not wrapped, since generate() calls the
+        original module). Falls back to eager execution if
+        compilation is unavailable or fails.
+
+        On CUDA, one-shot generation then switches to a static KV cache so
+        the decode step keeps the same shapes from token to token and the
+        "reduce-overhead" CUDA graphs are captured once and replayed.
+        """
+        if not hasattr(torch, "compile"):
+            self.logger.info("torch.compile not available (torch < 2.0); running eagerly")
+            return
+
+        # Persist compiled kernels so restarts skip recompilation
+        os.environ.setdefault(
+            "TORCHINDUCTOR_CACHE_DIR",
+            os.path.join(os.path.expanduser("~"), ".cache", "agi_agent", "inductor")
+        )
+
+        regions = self._find_compile_regions()
+        eager_forward = self.model.forward
+        try:
+            if regions:
+                for region in regions:
+                    region.compile(mode="reduce-overhead", fullgraph=True)
+                self.logger.info(f"Compiled {len(regions)} decoder MLP blocks with torch.compile")
+            else:
+                self.model.forward = torch.compile(
+                    eager_forward, mode="reduce-overhead", fullgraph=True
+                )
+                self.logger.info("Decoder blocks not found; compiled the full forward pass")
+
+            # Pay the compile cost now rather than on the first request
+            warmup_ids = torch.zeros((1, 8), dtype=torch.long, device=self.model.device)
+            with torch.inference_mode():
+                self.model.generate(
+                    input_ids=warmup_ids,
+                    attention_mask=torch.ones_like(warmup_ids),
+                    max_new_tokens=1,
+                    pad_token_id=self.tokenizer.eos_token_id
+                )
+            self.use_static_cache = self.device == "cuda"
+        except Exception as e:
+            self.model.forward = eager_forward
+            for region in regions:
+                region._compiled_call_impl = None
+            self.logger.warning("torch.compile failed (%s); running eagerly", e)
+
+    def _find_compile_regions(self):
+        """Return the feed-forward module of every decoder block, or [] if not found."""
+        base = getattr(self.model, "model", self.model)
+        layers = getattr(base, "layers", None)  # LLaMA / Mistral style
+        if layers is None:
+            transformer = getattr(self.model, "transformer", None)
+            layers = getattr(transformer, "h", None)  # GPT-2 style
+        if layers is None:
+            return []
+        return [block.mlp for block in layers if hasattr(block, "mlp")]
+
     def _initialize_fallback_model(self):
         """Initialize a smaller fallback model if the main model fails."""
         try:
-            # transformers is required even for fallback
-            from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline  # type: ignore
-
             fallback_model = "distilgpt2"
             self.logger.info(f"Loading fallback model: {fallback_model}")
 
-            self.tokenizer = AutoTokenizer.from_pretrained(fallback_model)
+            self.tokenizer = AutoTokenizer.from_pretrained(
+                fallback_model, padding_side="left", truncation_side="left"
+            )
             self.tokenizer.pad_token = self.tokenizer.eos_token
 
-            self.model = AutoModelForCausalLM.from_pretrained(fallback_model)
-            self.model = self.model.to(self.device)
-
-            self.pipeline = pipeline(
-                "text-generation",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if self.device == "cuda" else -1
-            )
+            self.model = self._from_pretrained(fallback_model, low_cpu_mem_usage=True)
+            self._is_fallback = True
 
             self.logger.info("Fallback model loaded successfully")
 
         except ImportError as e:
-            self.logger.warning("'transformers' not available for fallback (%s). Using simple local generator.", e)
+            self.logger.warning("Missing dependencies for fallback model (%s). Using simple local generator.", e)
             self.tokenizer = None
             self.model = None
             self.pipeline = self._simple_pipeline()
@@ -169,38 +372,54 @@ class CustomModelProvider:
         Generate a response to the given prompt.
 
         Args:
-            prompt: Input prompt
-            **kwargs: Additional generation parameters
+            prompt: Input prompt. When ``conversation_id`` is given this is only
+                the new turn; earlier turns are kept in the conversation's KV cache.
+            **kwargs: Additional generation parameters, plus an optional
+                ``conversation_id`` to reuse attention keys/values across calls
 
         Returns:
             Generated response text
         """
         try:
-            # Ensure we have some pipeline to use
-            if self.pipeline is None:
+            # Without a model, fall back to the simple local generator
+            if self.model is None and self.pipeline is None:
                 self.pipeline = self._simple_pipeline()
 
             # Prepare generation parameters
-            generation_kwargs = {
-                "max_length": kwargs.get("max_length", self.max_length),
-                "temperature": kwargs.get("temperature", self.temperature),
-                "top_p": kwargs.get("top_p", self.top_p),
-                "do_sample": kwargs.get("do_sample", self.do_sample),
-                "num_return_sequences": 1,
-                "return_full_text": False
-            }
-            # Only include pad_token_id if tokenizer is available
-            if getattr(self, "tokenizer", None) is not None and hasattr(self.tokenizer, "eos_token_id"):
-                generation_kwargs["pad_token_id"] = self.tokenizer.eos_token_id
-
-            # Run generation in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self._generate_sync,
-                prompt,
-                generation_kwargs
-            )
+            generation_kwargs = self._build_generation_kwargs(kwargs)
+
+            conversation_id = kwargs.get("conversation_id")
+
+            # Greedy decoding of a one-shot prompt is deterministic, so repeats can be served from cache
+            cache_key = None
+            if conversation_id is None and (not generation_kwargs["do_sample"] or generation_kwargs["temperature"] == 0.0):
+                cache_key = hashlib.blake2b(
+                    (prompt + json.dumps(sorted(generation_kwargs.items()))).encode("utf-8"),
+                    digest_size=16
+                ).digest()
+                cached = self._response_cache.get(cache_key)
+                if cached is not None:
+                    self._response_cache.move_to_end(cache_key)
+                    return cached
+
+            if conversation_id is None and self.model is not None and self.tokenizer is not None:
+                # One-shot prompts are coalesced with concurrent callers into one batch
+                result = await self._generate_batched(prompt, generation_kwargs)
+            else:
+                # Run generation in thread pool to avoid blocking
+                loop = asyncio.get_event_loop()
+                result = await loop.run_in_executor(
+                    self._gen_executor,
+                    self._generate_sync,
+                    prompt,
+                    generation_kwargs,
+                    conversation_id
+                )
+
+            if cache_key is not None and not result.startswith("Generation error"):
+                self._response_cache[cache_key] = result
+                if len(self._response_cache) > self.response_cache_size:
+                    self._response_cache.popitem(last=False)
 
             return result
 
@@ -208,10 +427,180 @@ class CustomModelProvider:
             self.logger.error(f"Error generating response: {e}")
             return f"Error: Unable to generate response - {str(e)}"
     
-    def _generate_sync(self, prompt: str, generation_kwargs: Dict[str, Any]) -> str:
+    async def generate_response_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """
+        Generate a response, yielding text chunks as tokens are decoded.
+
+        Chunks are the raw decoded text (special tokens skipped) without the
+        markup and whitespace cleanup applied by generate_response. Without a
+        loaded model, or for cached conversation turns, the full response is
+        yielded as a single chunk.
+        """
+        if self.model is None or self.tokenizer is None or kwargs.get("conversation_id") is not None:
+            yield await self.generate_response(prompt, **kwargs)
+            return
+
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        loop = asyncio.get_running_loop()
+        generation = loop.run_in_executor(
+            self._gen_executor,
+            self._generate_stream_sync,
+            prompt,
+            self._build_generation_kwargs(kwargs),
+            streamer
+        )
+
+        # The streamer blocks on a queue; wait on it off the event loop
+        while True:
+            chunk = await loop.run_in_executor(None, next, streamer, None)
+            if chunk is None:
+                break
+            if chunk:
+                yield chunk
+        await generation
+
+    def _generate_stream_sync(self, prompt: str, generation_kwargs: Dict[str, Any], streamer):
+        """Run generate() feeding decoded text into ``streamer``."""
+        try:
+            inputs, max_new_tokens = self._encode([prompt], generation_kwargs)
+            with torch.inference_mode():
+                self.model.generate(
+                    input_ids=inputs.input_ids,
+                    attention_mask=inputs.attention_mask,
+                    generation_config=self._get_generation_config(
+                        generation_kwargs, max_new_tokens, static_cache=self.use_static_cache
+                    ),
+                    streamer=streamer
+                )
+        except Exception as e:
+            self.logger.error(f"Streaming generation error: {e}")
+            # Unblock the consumer; generate() only ends the stream on success
+            streamer.end()
+
+    def _encode(self, prompts: List[str], generation_kwargs: Dict[str, Any], bucket_lengths: bool = True):
+        """Tokenize prompts, keeping room in max_length for the reply.
+
+        Prompts longer than ``max_length`` minus the reserved reply tokens
+        lose their oldest tokens, which bounds prefill attention and KV-cache
+        size. With the static cache, lengths are padded to a multiple of 64
+        unless ``bucket_lengths`` is False. Returns the encoded batch and the
+        max_new_tokens to generate.
+        """
+        max_length = generation_kwargs["max_length"]
+        max_new_tokens = generation_kwargs.get("max_new_tokens")
+        budget = max(1, max_length - self._reply_reserve(generation_kwargs))
+        # Bucket prompt lengths so static-cache prefill reuses captured graphs
+        bucket = 64 if bucket_lengths and self.use_static_cache and budget >= 64 else None
+        if bucket:
+            budget -= budget % bucket
+        inputs = self.tokenizer(
+            prompts,
+            padding=True,
+            truncation=True,
+            max_length=budget,
+            return_tensors="pt",
+            pad_to_multiple_of=bucket
+        ).to(self.model.device)
+        if not max_new_tokens:
+            max_new_tokens = max(1, max_length - inputs.input_ids.shape[-1])
+        return inputs, max_new_tokens
+
+    @staticmethod
+    def _reply_reserve(generation_kwargs: Dict[str, Any]) -> int:
+        """Tokens of max_length kept free for the reply: max_new_tokens, or a default share."""
+        max_length = generation_kwargs["max_length"]
+        return generation_kwargs.get("max_new_tokens") or min(256, max_length // 2)
+
+    def _build_generation_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve per-call generation settings against the provider defaults."""
+        generation_kwargs = {
+            "max_length": kwargs.get("max_length", self.max_length),
+            "max_new_tokens": kwargs.get("max_new_tokens"),
+            "temperature": kwargs.get("temperature", self.temperature),
+            "top_p": kwargs.get("top_p", self.top_p),
+            "do_sample": kwargs.get("do_sample", self.do_sample),
+            "num_return_sequences": 1,
+            "return_full_text": False
+        }
+        # Only include pad_token_id if tokenizer is available
+        if getattr(self, "tokenizer", None) is not None and hasattr(self.tokenizer, "eos_token_id"):
+            generation_kwargs["pad_token_id"] = self.tokenizer.eos_token_id
+        return generation_kwargs
+
+    async def _generate_batched(self, prompt: str, generation_kwargs: Dict[str, Any]) -> str:
+        """Queue a prompt for the batch worker and wait for its response."""
+        loop = asyncio.get_running_loop()
+        if self._batch_worker is None or self._batch_worker.done() or self._batch_worker.get_loop() is not loop:
+            self._batch_queue = asyncio.Queue()
+            self._batch_worker = loop.create_task(self._batch_loop(self._batch_queue))
+
+        future = loop.create_future()
+        await self._batch_queue.put((prompt, generation_kwargs, future))
+        return await future
+
+    async def _batch_loop(self, queue: asyncio.Queue):
+        """Collect requests arriving within batch_wait_timeout_s and generate them together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await queue.get()]
+            deadline = loop.time() + self.batch_wait_timeout_s
+            while len(items) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Only requests with identical sampling settings can share a generate() call
+            groups: Dict[Any, List[Any]] = {}
+            for item in items:
+                groups.setdefault(tuple(sorted(item[1].items())), []).append(item)
+
+            for group in groups.values():
+                prompts = [prompt for prompt, _, _ in group]
+                try:
+                    responses = await loop.run_in_executor(
+                        self._gen_executor, self._generate_batch_sync, prompts, group[0][1]
+                    )
+                except Exception as e:
+                    responses = [f"Generation error: {str(e)}"] * len(group)
+                for (_, _, future), response in zip(group, responses):
+                    if not future.done():
+                        future.set_result(response)
+
+    def _generate_batch_sync(self, prompts: List[str], generation_kwargs: Dict[str, Any]) -> List[str]:
+        """Run one left-padded generate() call over a batch of prompts."""
+        try:
+            inputs, max_new_tokens = self._encode(prompts, generation_kwargs)
+            prompt_len = inputs.input_ids.shape[-1]
+            with torch.inference_mode():
+                output_ids = self.model.generate(
+                    input_ids=inputs.input_ids,
+                    attention_mask=inputs.attention_mask,
+                    generation_config=self._get_generation_config(
+                        generation_kwargs, max_new_tokens, static_cache=self.use_static_cache
+                    )
+                )
+            # Decode only the new tokens; the prompt is never part of the text
+            texts = self.tokenizer.batch_decode(output_ids[:, prompt_len:], skip_special_tokens=True)
+            return [self._clean_response(text) for text in texts]
+        except Exception as e:
+            self.logger.error(f"Batch generation error: {e}")
+            return [f"Generation error: {str(e)}"] * len(prompts)
+
+    def _generate_sync(self, prompt: str, generation_kwargs: Dict[str, Any],
+                       conversation_id: Optional[str] = None) -> str:
         """Synchronous generation method."""
         try:
-            # Generate response via installed pipeline or simple fallback
+            if self.model is not None and self.tokenizer is not None:
+                # Multi-turn generation reuses cached keys/values
+                if conversation_id is not None:
+                    return self._generate_with_cache(prompt, generation_kwargs, conversation_id)
+                return self._generate_batch_sync([prompt], generation_kwargs)[0]
+
+            # Generate response via the simple fallback
             outputs = self.pipeline(
                 prompt,
                 **generation_kwargs
@@ -222,7 +611,7 @@ class CustomModelProvider:
                 generated_text = outputs[0]["generated_text"]
                 
                 # Clean up the response
-                response = self._clean_response(generated_text, prompt)
+                response = self._clean_response(generated_text)
                 return response
             else:
                 return "No response generated"
@@ -231,20 +620,97 @@ class CustomModelProvider:
             self.logger.error(f"Sync generation error: {e}")
             return f"Generation error: {str(e)}"
     
-    def _clean_response(self, generated_text: str, original_prompt: str) -> str:
-        """Clean and format the generated response."""
-        # Remove the original prompt if it's included
-        if generated_text.startswith(original_prompt):
-            response = generated_text[len(original_prompt):].strip()
+    def _generate_with_cache(self, prompt: str, generation_kwargs: Dict[str, Any],
+                             conversation_id: str) -> str:
+        """Generate the next turn of a conversation, reusing its KV cache.
+
+        Only the new turn is tokenized; the conversation's earlier prompt and
+        output tokens are already in the cache, so attention over them is not
+        recomputed.
+        """
+        # Same prompt truncation and per-turn budget one-shot prompts get, but no
+        # length bucketing: pad tokens would be attended to and kept in the history
+        inputs, _ = self._encode([prompt], generation_kwargs, bucket_lengths=False)
+        new_ids = inputs.input_ids
+        max_length = generation_kwargs["max_length"]
+        reserve = self._reply_reserve(generation_kwargs)
+        # An explicit max_new_tokens must fit in full; a default reply may shrink as history grows
+        min_reply = generation_kwargs.get("max_new_tokens") or min(32, reserve)
+
+        cache, history_ids = self._conversation_caches.get(conversation_id, (None, None))
+        history_length = 0 if history_ids is None else history_ids.shape[-1]
+        if history_length + new_ids.shape[-1] + min_reply > max_length:
+            # No room left for a reply within the context window; start the conversation over
+            cache, history_ids, history_length = None, None, 0
+        if cache is None:
+            cache = DynamicCache()
+        # The reply gets what the history leaves, up to the usual reserve
+        max_new_tokens = max(1, min(reserve, max_length - history_length - new_ids.shape[-1]))
+
+        input_ids = new_ids if history_ids is None else torch.cat([history_ids, new_ids], dim=-1)
+        with torch.inference_mode():
+            output_ids = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=cache,
+                generation_config=self._get_generation_config(generation_kwargs, max_new_tokens)
+            )
+        self._conversation_caches[conversation_id] = (cache, output_ids)
+        self._conversation_caches.move_to_end(conversation_id)
+        if len(self._conversation_caches) > self.conversation_cache_size:
+            self._conversation_caches.popitem(last=False)
+
+        generated_text = self.tokenizer.decode(
+            output_ids[0, input_ids.shape[-1]:],
+            skip_special_tokens=True
+        )
+        return self._clean_response(generated_text)
+
+    def _get_generation_config(self, generation_kwargs: Dict[str, Any], max_new_tokens: int,
+                               static_cache: bool = False):
+        """Return a cached GenerationConfig for these sampling settings and token budget."""
+        key = (
+            generation_kwargs["temperature"],
+            generation_kwargs["top_p"],
+            generation_kwargs["do_sample"],
+            max_new_tokens,
+            static_cache
+        )
+        config = self._generation_configs.get(key)
+        if config is None:
+            config = GenerationConfig(
+                temperature=key[0],
+                top_p=key[1],
+                do_sample=key[2],
+                max_new_tokens=max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                eos_token_id=self.tokenizer.eos_token_id,
+                cache_implementation="static" if static_cache else None
+            )
+            self._generation_configs[key] = config
+        return config
+
+    def reset_cache(self, conversation_id: Optional[str] = None):
+        """Drop the KV cache for one conversation, or for all when no id is given."""
+        if conversation_id is None:
+            self._conversation_caches.clear()
         else:
-            response = generated_text.strip()
-        
-        # Remove any special tokens
-        response = re.sub(r'<\|.*?\|>', '', response)
-        response = re.sub(r'\[.*?\]', '', response)
-        
+            self._conversation_caches.pop(conversation_id, None)
+
+    async def close(self):
+        """Stop the batch worker and release the generation thread."""
+        if self._batch_worker is not None and not self._batch_worker.done():
+            self._batch_worker.cancel()
+        self._gen_executor.shutdown(wait=False)
+        self.logger.info("Custom model provider closed")
+
+    def _clean_response(self, generated_text: str) -> str:
+        """Clean and format the generated response."""
+        # Special tokens are already dropped by decode(skip_special_tokens=True)
+        response = _MARKUP_RE.sub('', generated_text)
+
         # Clean up whitespace
-        response = ' '.join(response.split())
+        response = _WHITESPACE_RE.sub(' ', response).strip()
         
         return response if response else "I understand your request, but I need more context to provide a helpful response."
 
@@ -257,8 +723,10 @@ class CustomModelProvider:
             "temperature": self.temperature,
             "top_p": self.top_p,
             "model_loaded": self.model is not None,
+            "cached_conversations": len(self._conversation_caches),
+            "cached_responses": len(self._response_cache),
             "tokenizer_loaded": self.tokenizer is not None,
-            "mode": "full" if self.model is not None else ("fallback" if self.pipeline and self.tokenizer else "simple")
+            "mode": "fallback" if self._is_fallback else ("full" if self.model is not None else "simple")
         }
 
     def set_generation_params(self, **kwargs):
@@ -6,9 +6,30 @@ Handles storage, retrieval, and organization of knowledge.
 import json
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
+
+# Optional fast JSON parser for importing legacy JSON stores
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
+
+def _loads(data: Any) -> Any:
+    """Parse JSON from bytes or str."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _to_epoch(value: Any) -> float:
+    """Accept an epoch timestamp, or an ISO string written by older versions."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
 
 
 @dataclass
@@ -18,73 +39,191 @@ class KnowledgeItem:
     content: str
     category: str
     tags: List[str]
-    created_at: datetime
-    updated_at: datetime
+    created_at: float  # epoch seconds
+    updated_at: float  # epoch seconds
     confidence: float = 1.0
     source: str = "unknown"
+    # Search-time views of content/tags, derived once instead of per query
+    _content_lower: str = field(init=False, repr=False, compare=False)
+    _tags_set: frozenset = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.refresh_search_fields()
+
+    def refresh_search_fields(self):
+        """Recompute the derived search fields after content or tags change."""
+        self._content_lower = self.content.lower()
+        self._tags_set = frozenset(self.tags)
+
+    @property
+    def created_at_dt(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at)
+
+    @property
+    def updated_at_dt(self) -> datetime:
+        return datetime.fromtimestamp(self.updated_at)
     
     def to_dict(self) -> Dict[str, Any]:
         data = asdict(self)
-        data['created_at'] = self.created_at.isoformat()
-        data['updated_at'] = self.updated_at.isoformat()
+        del data['_content_lower'], data['_tags_set']
         return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'KnowledgeItem':
-        data['created_at'] = datetime.fromisoformat(data['created_at'])
-        data['updated_at'] = datetime.fromisoformat(data['updated_at'])
+        data['created_at'] = _to_epoch(data['created_at'])
+        data['updated_at'] = _to_epoch(data['updated_at'])
         return cls(**data)
 
 
 class KnowledgeManager:
     """
     Manages the agent's knowledge base.
+
+    Items live in a SQLite database (``knowledge.db``, WAL journal) with
+    indexes on category and tag, so lookups and mutations touch only the
+    affected rows. Recently used items are kept in a bounded in-memory cache.
     """
-    
-    def __init__(self, base_path: str = "./knowledge"):
+
+    SCHEMA = """
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        CREATE TABLE IF NOT EXISTS items (
+            id TEXT PRIMARY KEY,
+            content TEXT NOT NULL,
+            content_lower TEXT NOT NULL,
+            category TEXT NOT NULL,
+            source TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS item_tags (
+            item_id TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (item_id, tag)
+        );
+        CREATE INDEX IF NOT EXISTS idx_items_category ON items(category);
+        CREATE INDEX IF NOT EXISTS idx_items_rank ON items(confidence DESC, updated_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_item_tags_tag ON item_tags(tag);
+    """
+
+    def __init__(self, base_path: str = "./knowledge", cache_size: int = 1024):
         self.base_path = base_path
-        self.knowledge_items: Dict[str, KnowledgeItem] = {}
+        self.cache_size = cache_size
         self.logger = logging.getLogger(__name__)
+        # LRU of recently used items, keyed by id
+        self._item_cache: "OrderedDict[str, KnowledgeItem]" = OrderedDict()
         
         # Ensure knowledge directory exists
         os.makedirs(base_path, exist_ok=True)
+
+        self.db = sqlite3.connect(os.path.join(base_path, "knowledge.db"))
+        self.db.executescript(self.SCHEMA)
         
-        # Load existing knowledge
-        self._load_knowledge()
+        # Import knowledge saved by the earlier JSON-file store
+        self._migrate_json_store()
     
-    def _load_knowledge(self):
-        """Load knowledge from storage."""
+    def _migrate_json_store(self):
+        """Move items from a legacy knowledge.json (+ knowledge.wal) into the database."""
         knowledge_file = os.path.join(self.base_path, "knowledge.json")
-        
+        wal_file = os.path.join(self.base_path, "knowledge.wal")
+        if not os.path.exists(knowledge_file) and not os.path.exists(wal_file):
+            return
+
+        items: Dict[str, KnowledgeItem] = {}
         try:
             if os.path.exists(knowledge_file):
-                with open(knowledge_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
+                with open(knowledge_file, 'rb') as f:
+                    data = _loads(f.read())
                 for item_data in data.get('items', []):
                     item = KnowledgeItem.from_dict(item_data)
-                    self.knowledge_items[item.id] = item
-                
-                self.logger.info(f"Loaded {len(self.knowledge_items)} knowledge items")
-        
-        except Exception as e:
-            self.logger.error(f"Error loading knowledge: {e}")
-    
-    def _save_knowledge(self):
-        """Save knowledge to storage."""
-        knowledge_file = os.path.join(self.base_path, "knowledge.json")
-        
-        try:
-            data = {
-                "items": [item.to_dict() for item in self.knowledge_items.values()],
-                "last_updated": datetime.now().isoformat()
-            }
-            
-            with open(knowledge_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        
+                    items[item.id] = item
+
+            if os.path.exists(wal_file):
+                with open(wal_file, 'rb') as f:
+                    for line in f:
+                        try:
+                            entry = _loads(line)
+                        except ValueError:
+                            # A crash mid-append leaves a partial last line; drop it
+                            break
+                        if entry["op"] == "delete":
+                            items.pop(entry["id"], None)
+                        else:
+                            item = KnowledgeItem.from_dict(entry["item"])
+                            items[item.id] = item
+
+            with self.db:
+                for item in items.values():
+                    self._write_item(item)
         except Exception as e:
-            self.logger.error(f"Error saving knowledge: {e}")
+            self.logger.error(f"Error importing JSON knowledge store: {e}")
+            return
+
+        if os.path.exists(knowledge_file):
+            os.replace(knowledge_file, knowledge_file + ".migrated")
+        if os.path.exists(wal_file):
+            os.remove(wal_file)
+        self.logger.info(f"Imported {len(items)} knowledge items into knowledge.db")
+
+    def _write_item(self, item: KnowledgeItem):
+        """Insert or replace an item and its tags; callers own the transaction."""
+        self.db.execute(
+            "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (item.id, item.content, item._content_lower, item.category, item.source,
+             item.confidence, item.created_at, item.updated_at)
+        )
+        self.db.execute("DELETE FROM item_tags WHERE item_id = ?", (item.id,))
+        self.db.executemany(
+            "INSERT INTO item_tags VALUES (?, ?)",
+            ((item.id, tag) for tag in dict.fromkeys(item.tags))
+        )
+
+    def _cache_item(self, item: KnowledgeItem):
+        self._item_cache[item.id] = item
+        self._item_cache.move_to_end(item.id)
+        if len(self._item_cache) > self.cache_size:
+            self._item_cache.popitem(last=False)
+
+    def _load_items(self, ids: Iterable[str]) -> Dict[str, KnowledgeItem]:
+        """Fetch items by id, serving cached ones from memory."""
+        found: Dict[str, KnowledgeItem] = {}
+        missing = []
+        for item_id in ids:
+            item = self._item_cache.get(item_id)
+            if item is None:
+                missing.append(item_id)
+            else:
+                found[item_id] = item
+
+        if missing:
+            placeholders = ",".join("?" * len(missing))
+            tags: Dict[str, List[str]] = {item_id: [] for item_id in missing}
+            for item_id, tag in self.db.execute(
+                f"SELECT item_id, tag FROM item_tags WHERE item_id IN ({placeholders}) ORDER BY rowid",
+                missing
+            ):
+                tags[item_id].append(tag)
+            for row in self.db.execute(
+                f"SELECT id, content, category, source, confidence, created_at, updated_at "
+                f"FROM items WHERE id IN ({placeholders})",
+                missing
+            ):
+                item = KnowledgeItem(
+                    id=row[0],
+                    content=row[1],
+                    category=row[2],
+                    tags=tags[row[0]],
+                    created_at=row[5],
+                    updated_at=row[6],
+                    confidence=row[4],
+                    source=row[3]
+                )
+                found[item.id] = item
+
+        for item in found.values():
+            self._cache_item(item)
+        return found
     
     def add_knowledge(self, content: str, category: str, tags: List[str] = None, 
                      source: str = "agent", confidence: float = 1.0) -> str:
@@ -92,7 +231,7 @@ class KnowledgeManager:
         import uuid
         
         item_id = str(uuid.uuid4())
-        now = datetime.now()
+        now = time.time()
         
         item = KnowledgeItem(
             id=item_id,
@@ -105,98 +244,91 @@ class KnowledgeManager:
             source=source
         )
         
-        self.knowledge_items[item_id] = item
-        self._save_knowledge()
+        with self.db:
+            self._write_item(item)
+        self._cache_item(item)
         
         self.logger.info(f"Added knowledge item: {item_id}")
         return item_id
     
     def get_knowledge(self, item_id: str) -> Optional[KnowledgeItem]:
         """Get knowledge item by ID."""
-        return self.knowledge_items.get(item_id)
+        return self._load_items([item_id]).get(item_id)
     
     def search_knowledge(self, query: str, category: str = None, 
                         tags: List[str] = None, limit: int = 10) -> List[KnowledgeItem]:
         """Search knowledge items."""
-        results = []
-        query_lower = query.lower()
+        # content_lower is stored lowercased by Python, so matching stays Unicode-aware
+        sql = "SELECT id FROM items WHERE instr(content_lower, ?) > 0"
+        params: List[Any] = [query.lower()]
         
-        for item in self.knowledge_items.values():
-            # Check category filter
-            if category and item.category != category:
-                continue
-            
-            # Check tags filter
-            if tags and not any(tag in item.tags for tag in tags):
-                continue
-            
-            # Check content match
-            if query_lower in item.content.lower():
-                results.append(item)
+        # Check category filter
+        if category:
+            sql += " AND category = ?"
+            params.append(category)
         
-        # Sort by confidence and recency
-        results.sort(key=lambda x: (x.confidence, x.updated_at), reverse=True)
+        # Check tags filter
+        if tags:
+            sql += f" AND id IN (SELECT item_id FROM item_tags WHERE tag IN ({','.join('?' * len(tags))}))"
+            params.extend(tags)
         
-        return results[:limit]
+        # Sort by confidence and recency
+        sql += " ORDER BY confidence DESC, updated_at DESC LIMIT ?"
+        params.append(limit)
+
+        ids = [row[0] for row in self.db.execute(sql, params)]
+        items = self._load_items(ids)
+        return [items[item_id] for item_id in ids]
     
     def update_knowledge(self, item_id: str, content: str = None, 
                         tags: List[str] = None, confidence: float = None) -> bool:
         """Update existing knowledge item."""
-        if item_id not in self.knowledge_items:
+        item = self.get_knowledge(item_id)
+        if item is None:
             return False
         
-        item = self.knowledge_items[item_id]
-        
         if content is not None:
             item.content = content
         if tags is not None:
             item.tags = tags
         if confidence is not None:
             item.confidence = confidence
+        item.refresh_search_fields()
         
-        item.updated_at = datetime.now()
-        self._save_knowledge()
+        item.updated_at = time.time()
+        with self.db:
+            self._write_item(item)
         
         return True
     
     def delete_knowledge(self, item_id: str) -> bool:
         """Delete knowledge item."""
-        if item_id in self.knowledge_items:
-            del self.knowledge_items[item_id]
-            self._save_knowledge()
-            return True
-        return False
+        self._item_cache.pop(item_id, None)
+        with self.db:
+            deleted = self.db.execute("DELETE FROM items WHERE id = ?", (item_id,)).rowcount
+            self.db.execute("DELETE FROM item_tags WHERE item_id = ?", (item_id,))
+        return deleted > 0
     
     def get_categories(self) -> List[str]:
         """Get all knowledge categories."""
-        categories = set()
-        for item in self.knowledge_items.values():
-            categories.add(item.category)
-        return sorted(list(categories))
+        return [row[0] for row in self.db.execute("SELECT DISTINCT category FROM items ORDER BY category")]
     
     def get_tags(self) -> List[str]:
         """Get all knowledge tags."""
-        tags = set()
-        for item in self.knowledge_items.values():
-            tags.update(item.tags)
-        return sorted(list(tags))
+        return [row[0] for row in self.db.execute("SELECT DISTINCT tag FROM item_tags ORDER BY tag")]
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get knowledge base statistics."""
-        categories = {}
-        total_items = len(self.knowledge_items)
-        
-        for item in self.knowledge_items.values():
-            categories[item.category] = categories.get(item.category, 0) + 1
+        categories = dict(self.db.execute("SELECT category, COUNT(*) FROM items GROUP BY category"))
         
         return {
-            "total_items": total_items,
+            "total_items": sum(categories.values()),
             "categories": categories,
             "total_categories": len(categories),
-            "total_tags": len(self.get_tags())
+            "total_tags": self.db.execute("SELECT COUNT(DISTINCT tag) FROM item_tags").fetchone()[0]
         }
     
     async def close(self):
-        """Close knowledge manager and save data."""
-        self._save_knowledge()
+        """Close knowledge manager and its database connection."""
+        self.db.close()
         self.logger.info("Knowledge manager closed")
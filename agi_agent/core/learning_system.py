@@ -3,15 +3,18 @@ Learning system for the AGI Agent.
 Enables the agent to learn from experiences and improve performance.
 """
 
-import json
+import itertools
 import logging
-from typing import Dict, Any, List, Optional
+from collections import Counter, OrderedDict, deque
+from typing import Deque, Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+import numpy as np
 
 from .knowledge_manager import KnowledgeManager
 from ..models.task import Task
-from ..models.plan import ExecutionPlan
+from ..models.plan import ExecutionPlan, StepStatus
 
 
 @dataclass
@@ -24,6 +27,11 @@ class LearningExperience:
     lessons_learned: List[str]
     performance_metrics: Dict[str, float]
     timestamp: datetime
+    # Lowercased task_description, derived once for task-type matching
+    _description_lower: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._description_lower = self.task_description.lower()
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -37,16 +45,56 @@ class LearningExperience:
         }
 
 
+@dataclass
+class _TaskTypeStats:
+    """Running aggregates over the experiences matching one task type."""
+    seqs: Deque[int] = field(default_factory=deque)  # experience sequence numbers, oldest first
+    lessons: Counter = field(default_factory=Counter)
+    outcomes: Counter = field(default_factory=Counter)
+
+    def add(self, seq: int, experience: LearningExperience):
+        self.seqs.append(seq)
+        self.lessons.update(experience.lessons_learned)
+        self.outcomes[experience.outcome] += 1
+
+    def remove_oldest(self, experience: LearningExperience):
+        self.seqs.popleft()
+        for lesson in experience.lessons_learned:
+            self.lessons[lesson] -= 1
+            if not self.lessons[lesson]:
+                del self.lessons[lesson]
+        self.outcomes[experience.outcome] -= 1
+
+
 class LearningSystem:
     """
     Learning system that helps the agent improve through experience.
     """
+
+    INSIGHT_CACHE_SIZE = 128
     
-    def __init__(self, knowledge_manager: KnowledgeManager, enabled: bool = True):
+    def __init__(self, knowledge_manager: KnowledgeManager, enabled: bool = True,
+                 max_experiences: int = 1024):
         self.knowledge_manager = knowledge_manager
         self.enabled = enabled
-        self.experiences: List[LearningExperience] = []
+        # Most recent experiences; older ones are evicted (their lessons stay in the knowledge base)
+        self.max_experiences = max_experiences
+        self.experiences: Deque[LearningExperience] = deque(maxlen=max_experiences)
+        self._experience_seq = 0  # experiences ever stored; the next one's sequence number
+        self._experience_counter = itertools.count()
+        # One shared string object per distinct lesson across all experiences
+        self._lesson_pool: Dict[str, str] = {}
         self.logger = logging.getLogger(__name__)
+        # Lowercased task_type (None for all tasks) -> insights, LRU-bounded.
+        # A None value marks insights made stale by a newer experience.
+        self._insight_cache: "OrderedDict[Optional[str], Optional[Dict[str, Any]]]" = OrderedDict()
+        # Aggregates for each task type in the insight cache, kept up to date on ingest
+        self._type_stats: Dict[Optional[str], _TaskTypeStats] = {}
+        # Performance metrics (NaN where a metric is absent), a ring buffer holding
+        # experience seq in row seq % max_experiences; grows by doubling up to that size
+        self._metric_names: List[str] = []
+        self._metric_columns: Dict[str, int] = {}
+        self._metric_matrix = np.empty((0, 0))
         
         if not enabled:
             self.logger.info("Learning system disabled")
@@ -71,18 +119,21 @@ class LearningSystem:
             return None
         
         try:
+            # One pass over the plan's steps, shared by the analysis and the metrics
+            progress = execution_plan.get_progress()
+            
             # Analyze the execution
-            analysis = await self._analyze_execution(task, execution_plan, result)
+            analysis = await self._analyze_execution(task, execution_plan, result, progress)
             
             # Extract lessons learned
             lessons = await self._extract_lessons(analysis)
             
             # Calculate performance metrics
-            metrics = self._calculate_metrics(execution_plan, result)
+            metrics = self._calculate_metrics(execution_plan, result, progress)
             
-            # Create learning experience
+            # Create learning experience (ids are numbered, so two per second stay distinct)
             experience = LearningExperience(
-                id=f"exp_{task.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                id=f"exp_{task.id}_{next(self._experience_counter)}",
                 task_description=task.description,
                 execution_plan_id=execution_plan.id,
                 outcome=self._determine_outcome(result),
@@ -92,7 +143,7 @@ class LearningSystem:
             )
             
             # Store the experience
-            self.experiences.append(experience)
+            self._add_experience(experience)
             
             # Update knowledge base with lessons
             await self._update_knowledge_base(experience)
@@ -105,16 +156,21 @@ class LearningSystem:
             return None
     
     async def _analyze_execution(self, task: Task, execution_plan: ExecutionPlan, 
-                               result: Dict[str, Any]) -> Dict[str, Any]:
+                               result: Dict[str, Any], progress: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze the execution to identify learning opportunities."""
         analysis = {
             "task_complexity": self._assess_task_complexity(task),
-            "plan_effectiveness": self._assess_plan_effectiveness(execution_plan, result),
-            "step_performance": self._analyze_step_performance(execution_plan),
-            "resource_usage": self._analyze_resource_usage(execution_plan, result),
-            "error_patterns": self._identify_error_patterns(execution_plan)
+            "plan_effectiveness": self._assess_plan_effectiveness(execution_plan, result, progress),
+            "resource_usage": self._analyze_resource_usage(execution_plan, result)
         }
         
+        # Every step completed: there are no failures to break down or find patterns in
+        if progress["completed_steps"] == progress["total_steps"]:
+            analysis["step_performance"] = []
+            analysis["error_patterns"] = []
+        else:
+            analysis["step_performance"], analysis["error_patterns"] = self._analyze_steps(execution_plan)
+        
         return analysis
     
     async def _extract_lessons(self, analysis: Dict[str, Any]) -> List[str]:
@@ -139,12 +195,16 @@ class LearningSystem:
         if analysis["error_patterns"]:
             lessons.append("Implement better error handling for common failure modes")
         
-        return lessons
+        # Drop repeats (keeping first-seen order) so counters see each lesson once per experience
+        return [self._intern_lesson(lesson) for lesson in dict.fromkeys(lessons)]
     
-    def _calculate_metrics(self, execution_plan: ExecutionPlan, result: Dict[str, Any]) -> Dict[str, float]:
-        """Calculate performance metrics from execution."""
-        progress = execution_plan.get_progress()
-        
+    def _intern_lesson(self, lesson: str) -> str:
+        """Return the shared instance of an equal lesson string."""
+        return self._lesson_pool.setdefault(lesson, lesson)
+    
+    def _calculate_metrics(self, execution_plan: ExecutionPlan, result: Dict[str, Any],
+                           progress: Dict[str, Any]) -> Dict[str, float]:
+        """Calculate performance metrics from execution, given its get_progress() snapshot."""
         metrics = {
             "completion_rate": progress["progress_percentage"] / 100.0,
             "success_rate": 1.0 if result.get("success", False) else 0.0,
@@ -181,16 +241,37 @@ class LearningSystem:
         # Factor in description length (proxy for complexity)
         complexity += min(0.3, len(task.description) / 1000)
         
-        # Factor in context complexity
+        # Factor in context complexity (saturates at 100 characters of context)
         if task.context:
-            complexity += min(0.2, len(str(task.context)) / 500)
+            complexity += min(0.2, self._estimate_context_size(task.context, limit=100) / 500)
         
         return min(1.0, complexity)
     
-    def _assess_plan_effectiveness(self, execution_plan: ExecutionPlan, result: Dict[str, Any]) -> float:
-        """Assess how effective the execution plan was."""
-        progress = execution_plan.get_progress()
-        
+    @staticmethod
+    def _estimate_context_size(context: Any, limit: int) -> int:
+        """Approximate len(str(context)) from its structure, stopping once past limit."""
+        size = 0
+        pending = [context]
+        while pending and size <= limit:
+            item = pending.pop()
+            if isinstance(item, dict):
+                size += 2 + 4 * len(item)  # braces, then quotes/colon/separator per entry
+                pending.extend(item.keys())
+                pending.extend(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset)):
+                size += 2 + 2 * len(item)
+                pending.extend(item)
+            elif isinstance(item, str):
+                size += len(item) + 2
+            elif item is None or isinstance(item, (int, float)):
+                size += len(repr(item))
+            else:
+                size += 16
+        return size
+    
+    def _assess_plan_effectiveness(self, execution_plan: ExecutionPlan, result: Dict[str, Any],
+                                   progress: Dict[str, Any]) -> float:
+        """Assess how effective the execution plan was, given its get_progress() snapshot."""
         # Base effectiveness on completion rate
         effectiveness = progress["progress_percentage"] / 100.0
         
@@ -204,21 +285,31 @@ class LearningSystem:
         
         return max(0.0, effectiveness)
     
-    def _analyze_step_performance(self, execution_plan: ExecutionPlan) -> List[Dict[str, Any]]:
-        """Analyze performance of individual steps."""
+    def _analyze_steps(self, execution_plan: ExecutionPlan) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Analyze performance of individual steps and identify common error patterns."""
         step_analysis = []
+        error_types = {}
         
         for step in execution_plan.steps:
-            analysis = {
+            status = step.status
+            step_analysis.append({
                 "step_id": step.id,
                 "step_type": step.step_type.value,
-                "success": step.status.value == "completed",
+                "success": status is StepStatus.COMPLETED,
                 "duration": step.actual_duration,
                 "retry_count": step.retry_count
-            }
-            step_analysis.append(analysis)
+            })
+            
+            # Group failures by error type
+            if status is StepStatus.FAILED and step.error:
+                error_type = step.error.split(':')[0] if ':' in step.error else step.error
+                error_types[error_type] = error_types.get(error_type, 0) + 1
         
-        return step_analysis
+        # Identify patterns
+        patterns = [f"Recurring {error_type} errors"
+                    for error_type, count in error_types.items() if count > 1]
+        
+        return step_analysis, patterns
     
     def _analyze_resource_usage(self, execution_plan: ExecutionPlan, result: Dict[str, Any]) -> Dict[str, float]:
         """Analyze resource usage during execution."""
@@ -236,28 +327,6 @@ class LearningSystem:
         
         return usage
     
-    def _identify_error_patterns(self, execution_plan: ExecutionPlan) -> List[str]:
-        """Identify common error patterns."""
-        patterns = []
-        
-        failed_steps = [step for step in execution_plan.steps 
-                       if step.status.value == "failed"]
-        
-        if failed_steps:
-            # Group by error type
-            error_types = {}
-            for step in failed_steps:
-                if step.error:
-                    error_type = step.error.split(':')[0] if ':' in step.error else step.error
-                    error_types[error_type] = error_types.get(error_type, 0) + 1
-            
-            # Identify patterns
-            for error_type, count in error_types.items():
-                if count > 1:
-                    patterns.append(f"Recurring {error_type} errors")
-        
-        return patterns
-    
     async def _update_knowledge_base(self, experience: LearningExperience):
         """Update knowledge base with learning experience."""
         # Add lessons as knowledge items
@@ -272,7 +341,8 @@ class LearningSystem:
         
         # Add performance insights
         if experience.performance_metrics:
-            insight = f"Task performance: {json.dumps(experience.performance_metrics, indent=2)}"
+            insight = "Task performance: " + ", ".join(
+                f"{metric}={value:.3f}" for metric, value in experience.performance_metrics.items())
             self.knowledge_manager.add_knowledge(
                 content=insight,
                 category="performance_metrics",
@@ -281,58 +351,119 @@ class LearningSystem:
                 confidence=0.9
             )
     
+    def _add_experience(self, experience: LearningExperience):
+        """Store an experience, evicting the oldest one once max_experiences is reached."""
+        if len(self.experiences) == self.max_experiences:
+            self._evict_experience(self.experiences[0])
+        
+        seq = self._experience_seq
+        self._experience_seq += 1
+        self.experiences.append(experience)
+        self._record_metrics(seq, experience.performance_metrics)
+        
+        # Fold it into the aggregates of every tracked task type it matches
+        for key, stats in self._type_stats.items():
+            if key is None or key in experience._description_lower:
+                stats.add(seq, experience)
+                self._insight_cache[key] = None
+
+    def _evict_experience(self, experience: LearningExperience):
+        """Remove the oldest experience from the aggregates that include it."""
+        oldest = self._experience_seq - len(self.experiences)
+        for key, stats in self._type_stats.items():
+            if stats.seqs and stats.seqs[0] == oldest:
+                stats.remove_oldest(experience)
+                self._insight_cache[key] = None
+
+    def _record_metrics(self, seq: int, metrics: Dict[str, float]):
+        """Write an experience's metrics into its row of the metric matrix."""
+        for name in metrics:
+            if name not in self._metric_columns:
+                self._metric_columns[name] = len(self._metric_names)
+                self._metric_names.append(name)
+
+        row_index = seq % self.max_experiences
+        capacity, width = self._metric_matrix.shape
+        if row_index >= capacity or len(self._metric_names) > width:
+            if row_index >= capacity:
+                capacity = min(max(16, capacity * 2), self.max_experiences)
+            grown = np.full((capacity, len(self._metric_names)), np.nan)
+            grown[:self._metric_matrix.shape[0], :width] = self._metric_matrix
+            self._metric_matrix = grown
+
+        row = self._metric_matrix[row_index]
+        row.fill(np.nan)  # may still hold an evicted experience's values
+        for name, value in metrics.items():
+            row[self._metric_columns[name]] = value
+
     def get_learning_insights(self, task_type: str = None) -> Dict[str, Any]:
-        """Get learning insights for similar tasks."""
-        relevant_experiences = self.experiences
-        
-        if task_type:
-            relevant_experiences = [exp for exp in self.experiences 
-                                  if task_type.lower() in exp.task_description.lower()]
-        
-        if not relevant_experiences:
+        """Get learning insights for similar tasks.
+
+        Results are cached per task type until a matching experience is
+        learned; treat the returned dict as read-only.
+        """
+        key = task_type.lower() if task_type else None
+        if key in self._insight_cache:
+            self._insight_cache.move_to_end(key)
+            cached = self._insight_cache[key]
+            if cached is not None:
+                return cached
+
+        insights = self._build_insights(key)
+        self._insight_cache[key] = insights
+        if len(self._insight_cache) > self.INSIGHT_CACHE_SIZE:
+            evicted, _ = self._insight_cache.popitem(last=False)
+            del self._type_stats[evicted]
+        return insights
+
+    def _build_insights(self, task_type: Optional[str]) -> Dict[str, Any]:
+        """Build insights over experiences whose description contains task_type."""
+        stats = self._type_stats.get(task_type)
+        if stats is None:
+            # First query for this task type: scan once, then maintain on ingest
+            stats = _TaskTypeStats()
+            first_seq = self._experience_seq - len(self.experiences)
+            for seq, exp in enumerate(self.experiences, first_seq):
+                if task_type is None or task_type in exp._description_lower:
+                    stats.add(seq, exp)
+            self._type_stats[task_type] = stats
+        
+        if not stats.seqs:
             return {"insights": [], "recommendations": []}
         
-        # Aggregate insights
-        success_rate = sum(1 for exp in relevant_experiences 
-                          if exp.outcome == "success") / len(relevant_experiences)
-        
-        common_lessons = {}
-        for exp in relevant_experiences:
-            for lesson in exp.lessons_learned:
-                common_lessons[lesson] = common_lessons.get(lesson, 0) + 1
-        
-        # Sort lessons by frequency
-        top_lessons = sorted(common_lessons.items(), key=lambda x: x[1], reverse=True)[:5]
+        success_rate = stats.outcomes["success"] / len(stats.seqs)
+        top_lessons = stats.lessons.most_common(5)
         
         return {
-            "total_experiences": len(relevant_experiences),
+            "total_experiences": len(stats.seqs),
             "success_rate": success_rate,
             "top_lessons": [lesson for lesson, count in top_lessons],
-            "recommendations": self._generate_recommendations(relevant_experiences)
+            "recommendations": self._generate_recommendations(
+                stats.outcomes, np.array(stats.seqs, dtype=np.intp) % self.max_experiences)
         }
     
-    def _generate_recommendations(self, experiences: List[LearningExperience]) -> List[str]:
-        """Generate recommendations based on experiences."""
+    def _generate_recommendations(self, outcomes: Counter, rows: np.ndarray) -> List[str]:
+        """Generate recommendations from experiences' outcome counts and metric-matrix rows."""
         recommendations = []
         
-        if not experiences:
+        total = sum(outcomes.values())
+        if not total:
             return recommendations
         
         # Success rate based recommendations
-        success_rate = sum(1 for exp in experiences if exp.outcome == "success") / len(experiences)
+        success_rate = outcomes["success"] / total
         
         if success_rate < 0.7:
             recommendations.append("Consider more thorough planning for this type of task")
         
         # Performance based recommendations
-        avg_metrics = {}
-        for exp in experiences:
-            for metric, value in exp.performance_metrics.items():
-                avg_metrics[metric] = avg_metrics.get(metric, []) + [value]
-        
-        for metric, values in avg_metrics.items():
-            avg_value = sum(values) / len(values)
-            if avg_value < 0.8:
+        values = self._metric_matrix[rows]
+        recorded = ~np.isnan(values)
+        counts = recorded.sum(axis=0)
+        totals = np.where(recorded, values, 0.0).sum(axis=0)
+        
+        for metric, total, count in zip(self._metric_names, totals, counts):
+            if count and total / count < 0.8:
                 recommendations.append(f"Focus on improving {metric.replace('_', ' ')}")
         
         return recommendations
@@ -4,12 +4,14 @@ Handles understanding, analysis, and decision-making.
 """
 
 import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, Any, List, Optional, Union
-from dataclasses import dataclass
+import re
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
 from enum import Enum
-<<<<<<< HEAD
 # Optional dependencies: provide lightweight stubs if not installed so imports and tests don't break
 try:
     import openai  # type: ignore
@@ -28,24 +30,72 @@ except Exception:
             def __init__(self, *args, **kwargs):
                 pass
     anthropic = _AnthropicStub()  # type: ignore
-=======
-# Optional third-party providers; only required if selected via model_provider
-try:
-    import openai  # type: ignore
-except ImportError:
-    openai = None  # type: ignore
-
-try:
-    import anthropic  # type: ignore
-except ImportError:
-    anthropic = None  # type: ignore
->>>>>>> 5bc4d76c7d7e0fb8305d844d51ee0bbd29ce34f8
 
 from ..models.reasoning import ReasoningStep, ReasoningChain, ThoughtProcess
 from ..models.task import Task
 from .custom_model import CustomModelProvider
 
 
+# Start of a reasoning step: "N.", "Step N" or a "-"/"*" bullet, after leading whitespace
+_STEP_START_RE = re.compile(r"^[^\S\n]*(?:(\d+)\.|Step (\d+)|[-*] (?=[^\n]*\S))", re.MULTILINE)
+# The custom provider reports failures as text with one of these prefixes instead of raising
+_ERROR_RESPONSE_PREFIXES = ("Error:", "Generation error:")
+
+
+class _ReasoningStepParser:
+    """
+    Incremental parser turning model output into ReasoningSteps.
+
+    Text may be fed in arbitrary chunks. A step is emitted as soon as the
+    next step boundary arrives, so parsing keeps pace with a streamed response.
+    A numbered line only starts a step if it carries the next expected number;
+    otherwise it continues the current one.
+    """
+
+    def __init__(self):
+        self.steps: List[ReasoningStep] = []
+        self._buffer = ""
+        self._step_start: Optional[int] = None  # offset of the open step in _buffer
+        self._scanned = 0  # offset up to which _buffer has been searched for boundaries
+        self._started = 0
+
+    def feed(self, text: str):
+        self._buffer += text
+        # Only complete lines are scanned, so a boundary never straddles two chunks
+        self._scan(self._buffer.rfind("\n") + 1)
+
+    def close(self) -> List[ReasoningStep]:
+        self._scan(len(self._buffer))
+        if self._step_start is not None:
+            self._emit(len(self._buffer))
+            self._step_start = None
+        return self.steps
+
+    def _scan(self, end: int):
+        for match in _STEP_START_RE.finditer(self._buffer, self._scanned, end):
+            number = match.group(1) or match.group(2)
+            if number is None or int(number) == self._started + 1:
+                if self._step_start is not None:
+                    self._emit(match.start())
+                self._step_start = match.start()
+                self._started += 1
+
+        # Drop text that can no longer belong to a step
+        keep = end if self._step_start is None else self._step_start
+        self._buffer = self._buffer[keep:]
+        self._scanned = end - keep
+        if self._step_start is not None:
+            self._step_start = 0
+
+    def _emit(self, end: int):
+        text = self._buffer[self._step_start:end]
+        self.steps.append(ReasoningStep(
+            step_number=len(self.steps) + 1,
+            content=" ".join(filter(None, map(str.strip, text.split("\n")))),
+            reasoning_type="analytical"
+        ))
+
+
 class ReasoningType(Enum):
     ANALYTICAL = "analytical"
     CREATIVE = "creative"
@@ -62,6 +112,12 @@ class ReasoningContext:
     available_tools: Optional[List[str]] = None
     constraints: Optional[List[str]] = None
     knowledge_base: Optional[Dict[str, Any]] = None
+    # Prompt rendering of this context, filled in by ReasoningEngine._format_context
+    _formatted: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    def refresh_formatted(self):
+        """Drop the cached prompt rendering after changing fields in place."""
+        self._formatted = None
 
 
 class ReasoningEngine:
@@ -69,17 +125,40 @@ class ReasoningEngine:
     Core reasoning engine that provides various types of reasoning capabilities.
     """
     
-    def __init__(self, model_provider: str = "openai", model_name: str = "gpt-4", max_depth: int = 10):
+    def __init__(self, model_provider: str = "openai", model_name: str = "gpt-4", max_depth: int = 10,
+                 max_concurrency: int = 8):
         self.model_provider = model_provider
         self.model_name = model_name
         self.max_depth = max_depth
+        self.temperature = 0.7
         self.logger = logging.getLogger(__name__)
         
+        # Bound on in-flight provider requests, to stay within rate limits
+        self.max_concurrency = max_concurrency
+        # Created in the running loop by _get_request_semaphore; on 3.8/3.9 a semaphore
+        # made here would bind to whatever loop get_event_loop() returns at construction
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
+        self._request_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Responses to recurring prompts, keyed by SHA-256 of provider/model/temperature/prompt
+        self.response_cache_size = 1024
+        self._response_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        
         # Initialize AI model client
         self._initialize_model()
         
-        # Reasoning templates
+        # Reasoning templates, compiled once into prompt builders
         self.reasoning_templates = self._load_reasoning_templates()
+        # keyed by ReasoningType; types without a template of their own use the analytical one
+        compiled = {
+            name: self._compile_template(template)
+            for name, template in self.reasoning_templates.items()
+        }
+        self._analytical_builder = compiled["analytical"]
+        self._prompt_builders = {
+            reasoning_type: compiled.get(reasoning_type.value, self._analytical_builder)
+            for reasoning_type in ReasoningType
+        }
     
     def _initialize_model(self):
         """Initialize the AI model client."""
@@ -207,25 +286,62 @@ class ReasoningEngine:
         if context is None:
             context = ReasoningContext()
         
-        template = self.reasoning_templates.get(reasoning_type.value, self.reasoning_templates["analytical"])
+        return await self._reason(problem, reasoning_type, context)
+    
+    async def reason_about_problems_batch(
+        self,
+        problems: List[Tuple[str, ReasoningType]],
+        context: ReasoningContext = None
+    ) -> List[ReasoningChain]:
+        """
+        Apply reasoning to several problems, querying the model concurrently.
         
-        prompt = template.format(
-            problem=problem,
-            context=self._format_context(context)
-        )
+        Args:
+            problems: (problem, reasoning type) pairs
+            context: Context shared by all problems
+            
+        Returns:
+            ReasoningChains in the same order as problems, e.g. for synthesize_solutions
+        """
+        if context is None:
+            context = ReasoningContext()
         
+        return list(await asyncio.gather(*(
+            self._reason(problem, reasoning_type, context)
+            for problem, reasoning_type in problems
+        )))
+    
+    def _build_reasoning_prompt(self, problem: str, reasoning_type: ReasoningType,
+                                context: ReasoningContext) -> str:
+        """Render the reasoning template for a problem."""
+        build = self._prompt_builders.get(reasoning_type, self._analytical_builder)
+        return build(problem, self._format_context(context))
+    
+    @staticmethod
+    def _compile_template(template: str) -> Callable[[str, str], str]:
+        """Split a template around {problem} and {context} once, so rendering is plain concatenation."""
+        head, rest = template.split("{problem}")
+        middle, tail = rest.split("{context}")
         # Add chain-of-thought prompting
-        prompt += "\n\nThink through this step by step, showing your reasoning process."
-        
-        response = await self._query_model(prompt)
-        
-        # Parse the reasoning steps
-        steps = self._parse_reasoning_steps(response)
+        tail += "\n\nThink through this step by step, showing your reasoning process."
+        return lambda problem, context: head + problem + middle + context + tail
+    
+    async def _reason(self, problem: str, reasoning_type: ReasoningType,
+                      context: ReasoningContext) -> ReasoningChain:
+        """Query the model about a problem, parsing steps while the response streams in."""
+        parser = _ReasoningStepParser()
+        
+        # Creative prompts are meant to vary between calls, so never reuse an answer
+        async for text in self._query_model_stream(
+            self._build_reasoning_prompt(problem, reasoning_type, context),
+            cacheable=reasoning_type != ReasoningType.CREATIVE
+        ):
+            parser.feed(text)
         
         return ReasoningChain(
             problem=problem,
             reasoning_type=reasoning_type,
-            steps=steps,
+            steps=parser.close(),
             context=context
         )
     
@@ -293,36 +409,127 @@ class ReasoningEngine:
                 "next_steps": ["Review and refine solution"]
             }
     
-    async def _query_model(self, prompt: str) -> str:
-        """Query the AI model with a prompt."""
-        try:
-            if self.model_provider == "openai":
-                response = await self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.7
-                )
-                return response.choices[0].message.content
-
-            elif self.model_provider == "anthropic":
-                response = await self.client.messages.create(
-                    model=self.model_name,
-                    max_tokens=2000,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                return response.content[0].text
-
-            elif self.model_provider == "custom":
-                # Use custom model provider
-                response = await self.client.generate_response(prompt, temperature=0.7)
-                return response
+    def _get_request_semaphore(self) -> asyncio.Semaphore:
+        """Return the request semaphore for the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        if self._request_semaphore_loop is not loop:
+            self._request_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._request_semaphore_loop = loop
+        return self._request_semaphore
 
+    async def _query_model(self, prompt: str, cacheable: bool = True) -> str:
+        """Query the AI model with a prompt, reusing earlier answers to identical prompts."""
+        cache_key = self._response_cache_key(prompt) if cacheable else None
+        if cache_key is not None:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+                return cached
+
+        try:
+            async with self._get_request_semaphore():
+                response = await self._request_completion(prompt)
         except Exception as e:
             self.logger.error(f"Error querying model: {e}")
             return f"Error: Unable to process request - {str(e)}"
+
+        if cache_key is not None and response is not None:
+            self._cache_response(cache_key, response)
+        return response
+
+    async def _query_model_stream(self, prompt: str, cacheable: bool = True) -> AsyncIterator[str]:
+        """Like _query_model, but yield the response in chunks as the provider sends them."""
+        cache_key = self._response_cache_key(prompt) if cacheable else None
+        if cache_key is not None:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+                yield cached
+                return
+
+        chunks = []
+        try:
+            async with self._get_request_semaphore():
+                async for chunk in self._request_completion_stream(prompt):
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            self.logger.error(f"Error querying model: {e}")
+            yield f"Error: Unable to process request - {str(e)}"
+            return
+
+        if cache_key is not None:
+            self._cache_response(cache_key, "".join(chunks))
+
+    def _response_cache_key(self, prompt: str) -> bytes:
+        return hashlib.sha256(
+            f"{self.model_provider}|{self.model_name}|{self.temperature}|{prompt}".encode()
+        ).digest()
+
+    def _cache_response(self, cache_key: bytes, response: str):
+        if response.startswith(_ERROR_RESPONSE_PREFIXES):
+            # A transient failure must not be replayed for every later identical prompt
+            return
+        self._response_cache[cache_key] = response
+        if len(self._response_cache) > self.response_cache_size:
+            self._response_cache.popitem(last=False)
+
+    async def _request_completion(self, prompt: str) -> str:
+        """Send a prompt to the configured provider."""
+        if self.model_provider == "openai":
+            response = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature
+            )
+            return response.choices[0].message.content
+
+        elif self.model_provider == "anthropic":
+            response = await self.client.messages.create(
+                model=self.model_name,
+                max_tokens=2000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return response.content[0].text
+
+        elif self.model_provider == "custom":
+            # Use custom model provider
+            response = await self.client.generate_response(prompt, temperature=self.temperature)
+            return response
+
+    async def _request_completion_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Send a prompt to the configured provider, yielding text deltas as they arrive."""
+        if self.model_provider == "openai":
+            stream = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        elif self.model_provider == "anthropic":
+            stream = await self.client.messages.create(
+                model=self.model_name,
+                max_tokens=2000,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True
+            )
+            async for event in stream:
+                if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                    yield event.delta.text
+
+        elif self.model_provider == "custom":
+            # Raw stream chunks skip the cleanup generate_response applies, so take the whole reply
+            yield await self.client.generate_response(prompt, temperature=self.temperature)
     
     def _format_context(self, context: ReasoningContext) -> str:
-        """Format reasoning context for prompts."""
+        """Format reasoning context for prompts, reusing the result for the same context."""
+        if context._formatted is not None:
+            return context._formatted
+        
         context_parts = []
         
         if context.task:
@@ -337,45 +544,14 @@ class ReasoningEngine:
         if context.previous_steps:
             context_parts.append(f"Previous steps: {len(context.previous_steps)} completed")
         
-        return "\n".join(context_parts) if context_parts else "No additional context"
+        context._formatted = "\n".join(context_parts) if context_parts else "No additional context"
+        return context._formatted
     
     def _parse_reasoning_steps(self, response: str) -> List[ReasoningStep]:
         """Parse reasoning steps from model response."""
-        steps = []
-        lines = response.split('\n')
-        
-        current_step = None
-        step_counter = 1
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Look for numbered steps or bullet points
-            if (line.startswith(f"{step_counter}.") or 
-                line.startswith(f"Step {step_counter}") or
-                line.startswith("- ") or
-                line.startswith("* ")):
-                
-                if current_step:
-                    steps.append(current_step)
-                
-                current_step = ReasoningStep(
-                    step_number=step_counter,
-                    content=line,
-                    reasoning_type="analytical"
-                )
-                step_counter += 1
-            
-            elif current_step:
-                # Continue previous step
-                current_step.content += " " + line
-        
-        if current_step:
-            steps.append(current_step)
-        
-        return steps
+        parser = _ReasoningStepParser()
+        parser.feed(response)
+        return parser.close()
     
     def _fallback_parse_understanding(self, user_input: str, response: str) -> Dict[str, Any]:
         """Fallback parsing when JSON parsing fails."""
@@ -4,13 +4,51 @@ Implements safety mechanisms and human oversight.
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+import re
+import sys
+from typing import Dict, Any, List, Optional, Sequence
 from dataclasses import dataclass
 from enum import Enum
 
+# Optional linear-time regex engine for scanning large code payloads
+try:
+    import re2  # type: ignore
+except ImportError:
+    re2 = None  # type: ignore
+
 from ..models.plan import PlanStep
 
 
+# Risky description keywords and the risk factor each one signals
+_RISKY_KEYWORDS = {
+    "delete": "destructive_action",
+    "remove": "destructive_action",
+    "modify": "modification_action",
+    "install": "system_modification",
+    "download": "network_action",
+    "execute": "execution_action",
+    "run": "execution_action"
+}
+# Zero-width lookahead so overlapping keywords are all reported in a single scan
+_RISKY_KEYWORD_RE = re.compile("(?=(" + "|".join(map(re.escape, _RISKY_KEYWORDS)) + "))")
+
+_DANGEROUS_CODE_RE = (re2 or re).compile("|".join(map(re.escape, [
+    "import os", "import subprocess", "import sys",
+    "exec(", "eval(", "__import__",
+    "open(", "file(", "input(",
+    "rm ", "del ", "rmdir"
+])))
+
+_SYSTEM_PATHS = ("/etc", "/sys", "/proc", "/boot", "C:\\Windows", "C:\\System32")
+_EXECUTABLE_EXTENSIONS = (".exe", ".bat", ".sh", ".cmd", ".com", ".scr")
+
+# A parameter value is at most one of these, so a single anchored match classifies it
+_PARAMETER_RISK_RE = re.compile(
+    r"(?P<external_url>https?://)|(?P<system_path>"
+    + "|".join(map(re.escape, _SYSTEM_PATHS)) + ")"
+)
+
+
 class SafetyLevel(Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -27,24 +65,33 @@ class RiskCategory(Enum):
     EXTERNAL_COMMUNICATION = "external_communication"
 
 
-@dataclass
+# Serialized form of each member, so to_dict does plain dict hits instead of .value lookups
+_SAFETY_LEVEL_STR = {level: level.value for level in SafetyLevel}
+_RISK_CATEGORY_STR = {category: category.value for category in RiskCategory}
+
+
+# dataclass(slots=True) needs Python 3.10; older interpreters get a regular class
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS)
 class SafetyResult:
-    """Result of a safety check."""
+    """Result of a safety check. Frozen, since results may be shared; use dataclasses.replace to amend one."""
     approved: bool
     risk_level: SafetyLevel
-    risk_categories: List[RiskCategory]
+    risk_categories: Sequence[RiskCategory]
     reason: str
     requires_human_approval: bool = False
-    suggested_modifications: List[str] = None
+    suggested_modifications: Optional[Sequence[str]] = None
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "approved": self.approved,
-            "risk_level": self.risk_level.value,
-            "risk_categories": [cat.value for cat in self.risk_categories],
+            "risk_level": _SAFETY_LEVEL_STR[self.risk_level],
+            "risk_categories": [_RISK_CATEGORY_STR[cat] for cat in self.risk_categories],
             "reason": self.reason,
             "requires_human_approval": self.requires_human_approval,
-            "suggested_modifications": self.suggested_modifications or []
+            "suggested_modifications": list(self.suggested_modifications or [])
         }
 
 
@@ -53,6 +100,16 @@ class SafetyController:
     Safety controller that evaluates and controls agent actions.
     """
     
+    # Shared result for the common safe case; frozen, with tuples for its sequences
+    _APPROVED_LOW = SafetyResult(
+        approved=True,
+        risk_level=SafetyLevel.LOW,
+        risk_categories=(),
+        reason="Action approved",
+        requires_human_approval=False,
+        suggested_modifications=()
+    )
+    
     def __init__(self, level: str = "high", auto_approve_safe: bool = False):
         self.safety_level = SafetyLevel(level)
         self.auto_approve_safe = auto_approve_safe
@@ -60,6 +117,7 @@ class SafetyController:
         
         # Safety rules and policies
         self.safety_rules = self._initialize_safety_rules()
+        self._refresh_rule_flags()
         self.risk_assessments = self._initialize_risk_assessments()
         
         self.logger.info(f"Safety controller initialized with level: {level}")
@@ -95,6 +153,18 @@ class SafetyController:
         
         return base_rules
     
+    def _refresh_rule_flags(self):
+        """Mirror the rules consulted on every check as plain attributes."""
+        rules = self.safety_rules
+        self.require_approval_for_file_write: bool = rules.get("require_approval_for_file_write", False)
+        self.require_approval_for_code_execution: bool = rules.get("require_approval_for_code_execution", False)
+        self.require_approval_for_network_access: bool = rules.get("require_approval_for_network_access", False)
+        self.require_approval_for_file_read: bool = rules.get("require_approval_for_file_read", False)
+        self.block_all_system_modifications: bool = rules.get("block_all_system_modifications", False)
+        self.max_file_size_mb: int = rules["max_file_size_mb"]
+        self.max_network_requests: int = rules["max_network_requests"]
+        self.max_execution_time_seconds: int = rules["max_execution_time_seconds"]
+    
     def _initialize_risk_assessments(self) -> Dict[str, Dict[str, Any]]:
         """Initialize risk assessment rules for different actions."""
         return {
@@ -142,20 +212,37 @@ class SafetyController:
         Returns:
             SafetyResult indicating if the action is approved
         """
+        return self._check_action_sync(step)
+    
+    def check_actions(self, steps: List[PlanStep]) -> List[SafetyResult]:
+        """
+        Check several actions at once, e.g. every step of a plan before executing it.
+        
+        Args:
+            steps: The plan steps to check
+            
+        Returns:
+            One SafetyResult per step, in order
+        """
+        check = self._check_action_sync
+        return [check(step) for step in steps]
+    
+    def _check_action_sync(self, step: PlanStep) -> SafetyResult:
+        """Run a safety check; it is pure computation, so no awaiting is needed."""
         try:
             # Determine action type and assess risk
-            risk_assessment = await self._assess_risk(step)
+            risk_assessment = self._assess_risk(step)
             
             # Apply safety rules
             approval_result = self._apply_safety_rules(step, risk_assessment)
             
             # Log the safety check
-            self.logger.info(f"Safety check for {step.description}: {approval_result.approved}")
+            self.logger.info("Safety check for %s: %s", step.description, approval_result.approved)
             
             return approval_result
         
         except Exception as e:
-            self.logger.error(f"Error in safety check: {e}")
+            self.logger.error("Error in safety check: %s", e)
             # Fail safe - deny by default
             return SafetyResult(
                 approved=False,
@@ -165,7 +252,7 @@ class SafetyController:
                 requires_human_approval=True
             )
     
-    async def _assess_risk(self, step: PlanStep) -> Dict[str, Any]:
+    def _assess_risk(self, step: PlanStep) -> Dict[str, Any]:
         """Assess the risk level of a plan step."""
         risk_assessment = {
             "base_risk": SafetyLevel.LOW,
@@ -195,12 +282,13 @@ class SafetyController:
             "risk_categories": [],
             "risk_factors": []
         }
+        tool = tool_name.lower()
         
         # File operations
-        if "file" in tool_name.lower():
+        if "file" in tool:
             risk_assessment["risk_categories"].append(RiskCategory.FILE_OPERATIONS)
             
-            if "write" in tool_name.lower():
+            if "write" in tool:
                 risk_assessment["base_risk"] = SafetyLevel.MEDIUM
                 
                 # Check file path
@@ -215,7 +303,7 @@ class SafetyController:
                     risk_assessment["base_risk"] = SafetyLevel.HIGH
         
         # Code execution
-        if "exec" in tool_name.lower() or "run" in tool_name.lower():
+        if "exec" in tool or "run" in tool:
             risk_assessment["risk_categories"].append(RiskCategory.CODE_EXECUTION)
             risk_assessment["base_risk"] = SafetyLevel.HIGH
             
@@ -226,7 +314,7 @@ class SafetyController:
                 risk_assessment["base_risk"] = SafetyLevel.CRITICAL
         
         # Network access
-        if "web" in tool_name.lower() or "http" in tool_name.lower():
+        if "web" in tool or "http" in tool:
             risk_assessment["risk_categories"].append(RiskCategory.NETWORK_ACCESS)
             risk_assessment["base_risk"] = SafetyLevel.MEDIUM
         
@@ -234,40 +322,24 @@ class SafetyController:
     
     def _assess_description_risk(self, description: str) -> List[str]:
         """Assess risk based on step description."""
-        risk_factors = []
-        description_lower = description.lower()
-        
         # Look for risky keywords
-        risky_keywords = {
-            "delete": "destructive_action",
-            "remove": "destructive_action",
-            "modify": "modification_action",
-            "install": "system_modification",
-            "download": "network_action",
-            "execute": "execution_action",
-            "run": "execution_action"
-        }
-        
-        for keyword, risk_factor in risky_keywords.items():
-            if keyword in description_lower:
-                risk_factors.append(risk_factor)
+        found = set(_RISKY_KEYWORD_RE.findall(description.lower()))
+        if not found:
+            return []
         
-        return risk_factors
+        return [risk_factor for keyword, risk_factor in _RISKY_KEYWORDS.items() if keyword in found]
     
     def _assess_parameter_risk(self, parameters: Dict[str, Any]) -> List[str]:
         """Assess risk based on parameters."""
         risk_factors = []
         
-        # Check for URLs
-        for key, value in parameters.items():
+        # Check for URLs and system paths
+        match = _PARAMETER_RISK_RE.match
+        for value in parameters.values():
             if isinstance(value, str):
-                if value.startswith(("http://", "https://")):
-                    risk_factors.append("external_url")
-                
-                # Check for file paths
-                if "/" in value or "\\" in value:
-                    if self._is_system_path(value):
-                        risk_factors.append("system_path")
+                m = match(value)
+                if m:
+                    risk_factors.append(m.lastgroup)
         
         return risk_factors
     
@@ -296,13 +368,13 @@ class SafetyController:
                 reason = f"Action blocked by critical safety level: {base_risk.value}"
         
         # Check specific safety rules
-        if step.tool_name == "file_write" and self.safety_rules.get("require_approval_for_file_write"):
+        if step.tool_name == "file_write" and self.require_approval_for_file_write:
             requires_approval = True
             if not self.auto_approve_safe:
                 approved = False
             reason = "File write operations require approval"
         
-        if step.tool_name == "python_exec" and self.safety_rules.get("require_approval_for_code_execution"):
+        if step.tool_name == "python_exec" and self.require_approval_for_code_execution:
             requires_approval = True
             approved = False
             reason = "Code execution requires approval"
@@ -310,6 +382,10 @@ class SafetyController:
         # Generate suggestions
         suggestions = self._generate_safety_suggestions(step, risk_assessment)
         
+        if (base_risk is SafetyLevel.LOW and not requires_approval
+                and not risk_categories and not suggestions):
+            return self._APPROVED_LOW
+        
         return SafetyResult(
             approved=approved,
             risk_level=base_risk,
@@ -341,28 +417,21 @@ class SafetyController:
     
     def _is_system_path(self, path: str) -> bool:
         """Check if path is in a system directory."""
-        system_paths = ["/etc", "/sys", "/proc", "/boot", "C:\\Windows", "C:\\System32"]
-        return any(path.startswith(sys_path) for sys_path in system_paths)
+        return path.startswith(_SYSTEM_PATHS)
     
     def _is_executable_file(self, path: str) -> bool:
         """Check if file has executable extension."""
-        executable_extensions = [".exe", ".bat", ".sh", ".cmd", ".com", ".scr"]
-        return any(path.lower().endswith(ext) for ext in executable_extensions)
+        return path.lower().endswith(_EXECUTABLE_EXTENSIONS)
     
     def _contains_dangerous_code(self, code: str) -> bool:
         """Check if code contains dangerous patterns."""
-        dangerous_patterns = [
-            "import os", "import subprocess", "import sys",
-            "exec(", "eval(", "__import__",
-            "open(", "file(", "input(",
-            "rm ", "del ", "rmdir"
-        ]
-        return any(pattern in code for pattern in dangerous_patterns)
+        return _DANGEROUS_CODE_RE.search(code) is not None
     
     def update_safety_level(self, level: str):
         """Update the safety level."""
         self.safety_level = SafetyLevel(level)
         self.safety_rules = self._initialize_safety_rules()
+        self._refresh_rule_flags()
         self.logger.info(f"Safety level updated to: {level}")
     
     def get_safety_status(self) -> Dict[str, Any]:
@@ -3,15 +3,39 @@ Task planning system for the AGI Agent.
 Decomposes complex tasks into executable plans.
 """
 
+import asyncio
+import copy
+import hashlib
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import re
+import string
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
 
+# Optional fast JSON parser for plans embedded in model output
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
 from .reasoning_engine import ReasoningEngine, ReasoningType
 from ..models.task import Task
 from ..models.plan import ExecutionPlan, PlanStep, StepType
 
+# A step line in free-text plans: "N.", "Step N" or a "-"/"*" bullet, after leading whitespace
+_PLAN_STEP_RE = re.compile(r"^[^\S\n]*((?:(\d+)\.|Step (\d+)|[-*] (?=[^\n]*\S))[^\n]*)", re.MULTILINE)
+
+# Words that mark a task type clearly enough to skip asking the model
+_CLASSIFIER_KEYWORDS = {
+    "creative": frozenset({"design", "write", "story", "poem", "brainstorm", "invent", "creative", "imagine"}),
+    "analytical": frozenset({"analyze", "analyse", "analysis", "data", "statistics", "report", "compute", "research", "compare"}),
+    "problem_solving": frozenset({"debug", "fix", "solve", "troubleshoot", "diagnose", "bug", "error", "problem"})
+}
+_WORD_RE = re.compile(r"[a-z]+")
+
 
 class TaskPlanner:
     """
@@ -22,8 +46,18 @@ class TaskPlanner:
         self.reasoning_engine = reasoning_engine
         self.logger = logging.getLogger(__name__)
         
-        # Planning templates for different task types
+        # Plans already built, keyed by a hash of the task fields that go into the prompt.
+        # Cached plans are never executed; callers get copies.
+        self.plan_cache_size = 128
+        self._plan_cache: "OrderedDict[bytes, ExecutionPlan]" = OrderedDict()
+        self._plans_in_flight: Dict[bytes, "asyncio.Future[ExecutionPlan]"] = {}
+        
+        # Planning templates for different task types, compiled once into prompt builders
         self.planning_templates = self._load_planning_templates()
+        self._template_builders = {
+            name: self._compile_template(template)
+            for name, template in self.planning_templates.items()
+        }
     
     def _load_planning_templates(self) -> Dict[str, str]:
         """Load planning templates for different types of tasks."""
@@ -50,12 +84,14 @@ class TaskPlanner:
                 "estimated_duration": "Total estimated time in minutes",
                 "steps": [
                     {{
+                        "id": "step_1",
                         "description": "Step description",
                         "step_type": "reasoning|tool_call|decision|validation|synthesis",
                         "tool_name": "tool name if applicable",
                         "parameters": {{}},
                         "expected_output": "What this step should produce",
-                        "depends_on": ["step_ids"],
+                        "depends_on": ["ids of the steps whose output this step needs"],
+                        "independent": "true only if the step needs no earlier step at all",
                         "estimated_duration": "time in seconds"
                     }}
                 ]
@@ -117,29 +153,107 @@ class TaskPlanner:
             """
         }
     
-    async def create_plan(self, task: Task) -> ExecutionPlan:
+    @staticmethod
+    def _compile_template(template: str) -> Callable[[Dict[str, str]], str]:
+        """Parse a str.format template once into literal chunks and field names."""
+        chunks: List[Tuple[str, Optional[str]]] = [
+            (literal, field_name)
+            for literal, field_name, _, _ in string.Formatter().parse(template)
+        ]
+        return lambda fields: "".join([
+            literal if field_name is None else literal + fields[field_name]
+            for literal, field_name in chunks
+        ])
+    
+    async def create_plan(self, task: Task, force_refresh: bool = False) -> ExecutionPlan:
         """
         Create an execution plan for a task.
         
         Args:
             task: The task to create a plan for
+            force_refresh: Plan again even if an identical task was planned before
             
         Returns:
             ExecutionPlan with detailed steps
         """
-        self.logger.info(f"Creating execution plan for task: {task.id}")
+        key = self._plan_cache_key(task)
+        pending = None
+        if not force_refresh:
+            cached = self._plan_cache.get(key)
+            if cached is not None:
+                self._plan_cache.move_to_end(key)
+                self.logger.info("Reusing cached execution plan for task: %s", task.id)
+                return self._copy_plan(cached, task)
+            # Share a plan that is already being built for an identical task
+            pending = self._plans_in_flight.get(key)
+        
+        if pending is None:
+            pending = asyncio.ensure_future(self._build_and_cache_plan(task, key))
+            self._plans_in_flight[key] = pending
+        return self._copy_plan(await asyncio.shield(pending), task)
+    
+    async def create_plans(self, tasks: List[Task], force_refresh: bool = False) -> List[ExecutionPlan]:
+        """
+        Create execution plans for several tasks at once.
+        
+        The tasks' classification and planning requests run concurrently instead of
+        back to back (the reasoning engine bounds how many reach the provider at a
+        time), and unless force_refresh is set identical tasks share a single plan build.
+        
+        Args:
+            tasks: The tasks to create plans for
+            force_refresh: Plan again even if an identical task was planned before
+            
+        Returns:
+            ExecutionPlans in the same order as tasks
+        """
+        return list(await asyncio.gather(*(
+            self.create_plan(task, force_refresh=force_refresh) for task in tasks
+        )))
+    
+    def _plan_cache_key(self, task: Task) -> bytes:
+        return hashlib.blake2b(
+            f"{task.description}|{task.requirements_str}|{task.constraints_str}|{task.context_json}".encode(),
+            digest_size=16
+        ).digest()
+    
+    @staticmethod
+    def _copy_plan(plan: ExecutionPlan, task: Task) -> ExecutionPlan:
+        """Give a caller its own copy of a cached plan, owned by the given task."""
+        plan = copy.deepcopy(plan)
+        plan.id = str(uuid.uuid4())
+        plan.task_id = task.id
+        plan.created_at = datetime.now()
+        return plan
+    
+    async def _build_and_cache_plan(self, task: Task, key: bytes) -> ExecutionPlan:
+        try:
+            plan = await self._build_plan(task)
+        finally:
+            if self._plans_in_flight.get(key) is asyncio.current_task():
+                del self._plans_in_flight[key]
+        
+        self._plan_cache[key] = plan
+        self._plan_cache.move_to_end(key)
+        if len(self._plan_cache) > self.plan_cache_size:
+            self._plan_cache.popitem(last=False)
+        return plan
+    
+    async def _build_plan(self, task: Task) -> ExecutionPlan:
+        """Plan a task from scratch with the reasoning engine."""
+        self.logger.info("Creating execution plan for task: %s", task.id)
         
         # Determine task type and select appropriate template
         task_type = await self._classify_task(task)
-        template = self.planning_templates.get(task_type, self.planning_templates["general"])
+        build = self._template_builders.get(task_type, self._template_builders["general"])
         
         # Generate the plan using reasoning engine
-        plan_prompt = template.format(
-            task_description=task.description,
-            requirements=", ".join(task.requirements) if task.requirements else "None specified",
-            constraints=", ".join(task.constraints) if task.constraints else "None specified",
-            context=json.dumps(task.context, indent=2) if task.context else "{}"
-        )
+        plan_prompt = build({
+            "task_description": task.description,
+            "requirements": task.requirements_str,
+            "constraints": task.constraints_str,
+            "context": task.context_json
+        })
         
         # Use strategic reasoning to create the plan
         reasoning_chain = await self.reasoning_engine.reason_about_problem(
@@ -148,7 +262,7 @@ class TaskPlanner:
         )
         
         # Parse the plan from the reasoning result
-        plan_data = await self._parse_plan_from_reasoning(reasoning_chain)
+        plan_data = self._parse_plan_from_reasoning(reasoning_chain)
         
         # Create execution plan object
         execution_plan = ExecutionPlan(
@@ -159,27 +273,68 @@ class TaskPlanner:
         )
         
         # Create plan steps
-        for i, step_data in enumerate(plan_data.get("steps", [])):
+        steps_data = plan_data.get("steps", [])
+        for i, step_data in enumerate(steps_data):
             step = PlanStep(
                 description=step_data.get("description", f"Step {i+1}"),
                 step_type=StepType(step_data.get("step_type", "reasoning")),
                 tool_name=step_data.get("tool_name"),
                 parameters=step_data.get("parameters", {}),
                 expected_output=step_data.get("expected_output"),
-                depends_on=step_data.get("depends_on", []),
                 estimated_duration=step_data.get("estimated_duration", 60)
             )
             execution_plan.add_step(step)
+        self._resolve_dependencies(execution_plan.steps, steps_data)
         
         # Validate and optimize the plan
-        await self._validate_plan(execution_plan)
-        await self._optimize_plan(execution_plan)
+        self._validate_plan(execution_plan)
+        self._optimize_plan(execution_plan)
         
-        self.logger.info(f"Created execution plan with {len(execution_plan.steps)} steps")
+        self.logger.info("Created execution plan with %d steps", len(execution_plan.steps))
         return execution_plan
     
+    def _resolve_dependencies(self, steps: List[PlanStep], steps_data: List[Dict[str, Any]]):
+        """Translate the model's step references into the generated step ids.
+        
+        The model refers to steps by its own ids ("step_2"), by number (2, "2",
+        "Step 2") or by description. A step left without any resolvable dependency
+        depends on the previous step unless it is marked independent, so steps only
+        run concurrently when the plan says they may.
+        """
+        aliases: Dict[str, str] = {}
+        for number, (step, step_data) in enumerate(zip(steps, steps_data), 1):
+            for alias in (number, f"step_{number}", f"step{number}", f"step {number}",
+                          step_data.get("id"), step.description):
+                if alias is not None:
+                    aliases.setdefault(str(alias).strip().lower(), step.id)
+        
+        previous = None
+        for step, step_data in zip(steps, steps_data):
+            depends_on = []
+            for reference in step_data.get("depends_on") or []:
+                dep_id = aliases.get(str(reference).strip().lower())
+                if dep_id is None or dep_id == step.id:
+                    self.logger.warning("Step %s depends on unknown step %r", step.id, reference)
+                elif dep_id not in depends_on:
+                    depends_on.append(dep_id)
+            
+            independent = str(step_data.get("independent", "")).strip().lower() == "true"
+            if not depends_on and previous is not None and not independent:
+                depends_on.append(previous.id)
+            step.depends_on = depends_on
+            previous = step
+    
     async def _classify_task(self, task: Task) -> str:
         """Classify the task to select appropriate planning template."""
+        # A clear keyword majority decides without a model round-trip
+        words = set(_WORD_RE.findall(" ".join([task.description, *task.requirements]).lower()))
+        scores = sorted(
+            ((len(words & keywords), category) for category, keywords in _CLASSIFIER_KEYWORDS.items()),
+            reverse=True
+        )
+        if scores[0][0] >= 2 and scores[0][0] > scores[1][0]:
+            return scores[0][1]
+        
         classification_prompt = f"""
         Classify this task into one of these categories:
         - general: Standard task requiring mixed capabilities
@@ -201,7 +356,7 @@ class TaskPlanner:
         else:
             return "general"
     
-    async def _parse_plan_from_reasoning(self, reasoning_chain) -> Dict[str, Any]:
+    def _parse_plan_from_reasoning(self, reasoning_chain) -> Dict[str, Any]:
         """Parse execution plan from reasoning chain result."""
         # Get the conclusion from the reasoning chain
         conclusion = reasoning_chain.get_conclusion()
@@ -217,48 +372,32 @@ class TaskPlanner:
             
             if json_start >= 0 and json_end > json_start:
                 json_str = conclusion[json_start:json_end]
-                return json.loads(json_str)
+                return orjson.loads(json_str) if orjson is not None else json.loads(json_str)
         
-        except json.JSONDecodeError:
+        except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError
             pass
         
         # Fallback: parse steps from text
-        return await self._fallback_parse_plan(conclusion)
+        return self._fallback_parse_plan(conclusion)
     
-    async def _fallback_parse_plan(self, text: str) -> Dict[str, Any]:
+    def _fallback_parse_plan(self, text: str) -> Dict[str, Any]:
         """Fallback parsing when JSON parsing fails."""
         steps = []
-        lines = text.split('\n')
-        
-        current_step = None
-        step_counter = 1
         
-        for line in lines:
-            line = line.strip()
-            if not line:
+        # A numbered line only counts if it carries the next expected step number
+        for match in _PLAN_STEP_RE.finditer(text):
+            number = match.group(2) or match.group(3)
+            if number is not None and int(number) != len(steps) + 1:
                 continue
             
-            # Look for step indicators
-            if (line.startswith(f"{step_counter}.") or 
-                line.startswith(f"Step {step_counter}") or
-                line.startswith("- ") or
-                line.startswith("* ")):
-                
-                if current_step:
-                    steps.append(current_step)
-                
-                current_step = {
-                    "description": line,
-                    "step_type": "reasoning",
-                    "parameters": {},
-                    "expected_output": "Step completion",
-                    "depends_on": [],
-                    "estimated_duration": 60
-                }
-                step_counter += 1
-        
-        if current_step:
-            steps.append(current_step)
+            steps.append({
+                "description": match.group(1).rstrip(),
+                "step_type": "reasoning",
+                "parameters": {},
+                "expected_output": "Step completion",
+                "depends_on": [],
+                "estimated_duration": 60
+            })
         
         return {
             "plan_description": "Generated execution plan",
@@ -266,77 +405,77 @@ class TaskPlanner:
             "steps": steps
         }
     
-    async def _validate_plan(self, plan: ExecutionPlan):
+    def _validate_plan(self, plan: ExecutionPlan):
         """Validate the execution plan for consistency and feasibility."""
-        # Check for circular dependencies
-        self._check_circular_dependencies(plan)
-        
-        # Validate step dependencies exist
-        self._validate_dependencies(plan)
+        in_degree = {step.id: 0 for step in plan.steps}
+        dependents: Dict[str, List[str]] = {step.id: [] for step in plan.steps}
+        required_tools = set()
         
-        # Check for required tools
-        await self._check_tool_availability(plan)
-    
-    def _check_circular_dependencies(self, plan: ExecutionPlan):
-        """Check for circular dependencies in the plan."""
-        def has_cycle(step_id: str, visited: set, rec_stack: set) -> bool:
-            visited.add(step_id)
-            rec_stack.add(step_id)
+        # One pass over the steps: drop dependencies on non-existent steps,
+        # build the dependency graph and collect the required tools
+        for step in plan.steps:
+            if step.tool_name:
+                required_tools.add(step.tool_name)
             
-            step = plan.get_step_by_id(step_id)
-            if step:
+            if not all(dep_id in in_degree for dep_id in step.depends_on):
                 for dep_id in step.depends_on:
-                    if dep_id not in visited:
-                        if has_cycle(dep_id, visited, rec_stack):
-                            return True
-                    elif dep_id in rec_stack:
-                        return True
+                    if dep_id not in in_degree:
+                        self.logger.warning("Step %s depends on non-existent step %s", step.id, dep_id)
+                step.depends_on[:] = [dep_id for dep_id in step.depends_on if dep_id in in_degree]
             
-            rec_stack.remove(step_id)
-            return False
+            for dep_id in step.depends_on:
+                dependents[dep_id].append(step.id)
+                in_degree[step.id] += 1
         
-        visited = set()
-        for step in plan.steps:
-            if step.id not in visited:
-                if has_cycle(step.id, visited, set()):
-                    raise ValueError(f"Circular dependency detected in plan {plan.id}")
+        # Check for circular dependencies while grouping steps into parallel layers
+        self._identify_parallel_steps(plan, in_degree, dependents)
+        
+        # Check for required tools
+        self._check_tool_availability(required_tools)
     
-    def _validate_dependencies(self, plan: ExecutionPlan):
-        """Validate that all step dependencies exist."""
-        step_ids = {step.id for step in plan.steps}
+    def _identify_parallel_steps(self, plan: ExecutionPlan, in_degree: Dict[str, int],
+                                 dependents: Dict[str, List[str]]):
+        """Group steps into plan.execution_layers of mutually independent steps.
         
-        for step in plan.steps:
-            for dep_id in step.depends_on:
-                if dep_id not in step_ids:
-                    self.logger.warning(f"Step {step.id} depends on non-existent step {dep_id}")
-                    step.depends_on.remove(dep_id)
+        Layered Kahn's topological sort; in_degree (step id -> number of
+        dependencies) is consumed. Raises ValueError on circular dependencies.
+        """
+        layers = []
+        layer = [step_id for step_id, degree in in_degree.items() if degree == 0]
+        processed = 0
+        while layer:
+            layers.append(layer)
+            processed += len(layer)
+            
+            # Steps whose last outstanding dependency is in this layer form the next one
+            next_layer = []
+            for step_id in layer:
+                for dependent in dependents[step_id]:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        next_layer.append(dependent)
+            layer = next_layer
+        
+        # Steps never reaching zero outstanding dependencies are on a cycle
+        if processed != len(in_degree):
+            raise ValueError(f"Circular dependency detected in plan {plan.id}")
+        
+        plan.execution_layers = layers
     
-    async def _check_tool_availability(self, plan: ExecutionPlan):
+    def _check_tool_availability(self, required_tools: Set[str]):
         """Check if required tools are available."""
         # This would integrate with the tool framework
         # For now, just log the required tools
-        required_tools = set()
-        for step in plan.steps:
-            if step.tool_name:
-                required_tools.add(step.tool_name)
-        
-        if required_tools:
-            self.logger.info(f"Plan requires tools: {', '.join(required_tools)}")
+        if required_tools and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Plan requires tools: %s", ", ".join(required_tools))
     
-    async def _optimize_plan(self, plan: ExecutionPlan):
+    def _optimize_plan(self, plan: ExecutionPlan):
         """Optimize the execution plan for efficiency."""
-        # Identify steps that can run in parallel
-        self._identify_parallel_steps(plan)
+        # Steps that can run in parallel were grouped into layers during validation
         
         # Optimize step ordering
         self._optimize_step_order(plan)
     
-    def _identify_parallel_steps(self, plan: ExecutionPlan):
-        """Identify steps that can be executed in parallel."""
-        # This is a placeholder for parallel execution optimization
-        # Would analyze dependencies to find independent steps
-        pass
-    
     def _optimize_step_order(self, plan: ExecutionPlan):
         """Optimize the order of steps for efficiency."""
         # This is a placeholder for step ordering optimization
@@ -374,6 +513,6 @@ class TaskPlanner:
         
         # Parse adaptations and apply them
         # This is a simplified implementation
-        self.logger.info(f"Plan adaptation suggested: {response}")
+        self.logger.info("Plan adaptation suggested: %s", response)
         
         return plan  # Return original plan for now
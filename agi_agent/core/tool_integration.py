@@ -3,26 +3,63 @@ Tool integration framework for the AGI Agent.
 Manages discovery, registration, and execution of external tools.
 """
 
+import ast
+import asyncio
+import copy
+import functools
 import json
+import math
+import operator
 # Optional dependency: PyYAML for config loading
 try:
     import yaml  # type: ignore
+    # libyaml's C loader when PyYAML was built with it, else the pure-Python one
+    _YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 except Exception:
     yaml = None  # type: ignore
+# Optional fast JSON parser for tools.json configs
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
 import logging
 import importlib
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
 # The user may need to install this dependency: pip install pyautogui
 # Optional dependency: pyautogui for sending hotkeys
 try:
     import pyautogui  # type: ignore
 except Exception:
     pyautogui = None  # type: ignore
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Tuple
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
 
-@dataclass
+# Resolved (module, class) pairs from tool configs. Failures are not kept, so a
+# module installed after a failed attempt is picked up on the next config reload
+_import_cache: Dict[Tuple[str, str], type] = {}
+
+
+def _cached_import(module_name: str, class_name: str) -> type:
+    """Import module_name and return its class_name attribute, memoizing successful lookups."""
+    key = (module_name, class_name)
+    cached = _import_cache.get(key)
+    if cached is None:
+        module = sys.modules.get(module_name) or importlib.import_module(module_name)
+        cached = _import_cache[key] = getattr(module, class_name)
+    return cached
+
+
+# dataclass(slots=True) needs Python 3.10; older interpreters get a regular class
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS)
 class ToolDefinition:
     """Definition of a tool that can be used by the agent."""
     name: str
@@ -32,6 +69,9 @@ class ToolDefinition:
     category: str = "general"
     safety_level: str = "medium"  # low, medium, high
     requires_approval: bool = False
+    # Deterministic tools may have results reused for identical parameters
+    cacheable: bool = False
+    cache_ttl_s: Optional[float] = None  # None keeps cached results until evicted
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -41,7 +81,9 @@ class ToolDefinition:
             "return_type": self.return_type,
             "category": self.category,
             "safety_level": self.safety_level,
-            "requires_approval": self.requires_approval
+            "requires_approval": self.requires_approval,
+            "cacheable": self.cacheable,
+            "cache_ttl_s": self.cache_ttl_s
         }
 
 
@@ -72,8 +114,22 @@ class ToolIntegrationFramework:
         self.config_path = config_path
         self.tools: Dict[str, BaseTool] = {}
         self.tool_definitions: Dict[str, ToolDefinition] = {}
+        self._tool_names: Tuple[str, ...] = ()
         self.logger = logging.getLogger(__name__)
         
+        # Read-only views of the catalog, built on first use after a registration
+        self._definitions_view: Optional[Tuple[ToolDefinition, ...]] = None
+        self._definition_dicts_view: Optional[Tuple[Dict[str, Any], ...]] = None
+        self._by_category_view: Optional[Dict[str, Tuple[ToolDefinition, ...]]] = None
+        
+        # Results of cacheable tools, keyed by (tool name, canonical JSON of the parameters);
+        # values are (expiry on the monotonic clock or None, result envelope)
+        self.result_cache_size = 512
+        self._result_cache: "OrderedDict[Tuple[str, str], Tuple[Optional[float], Dict[str, Any]]]" = OrderedDict()
+        
+        # Tool calls running in the background, keyed by the handle given to the caller
+        self._pending: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+        
         # Initialize built-in tools
         self._initialize_builtin_tools()
         
@@ -96,20 +152,26 @@ class ToolIntegrationFramework:
         self.register_tool("calculator", CalculatorTool())
         self.register_tool("kill_program", KillProgramTool())
         
-        self.logger.info(f"Initialized {len(self.tools)} built-in tools")
+        self.logger.info("Initialized %d built-in tools", len(self.tools))
     
     def _load_tools_from_config(self):
-        """Load external tools from configuration file."""
-        # If PyYAML is not available, skip external config gracefully
-        if yaml is None:
+        """Load external tools from configuration file (YAML, or JSON for a .json path)."""
+        is_json = self.config_path.endswith(".json")
+        # If PyYAML is not available, skip external YAML config gracefully
+        if yaml is None and not is_json:
             self.logger.info(
                 "PyYAML not installed; skipping external tools config at %s",
                 self.config_path,
             )
             return
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f) or {}
+            if is_json:
+                with open(self.config_path, 'rb') as f:
+                    data = f.read()
+                config = (orjson.loads(data) if orjson is not None else json.loads(data)) or {}
+            else:
+                with open(self.config_path, 'r', encoding='utf-8') as f:
+                    config = yaml.load(f, Loader=_YamlLoader) or {}
 
             for tool_config in config.get('tools', []) or []:
                 self._load_external_tool(tool_config)
@@ -119,7 +181,7 @@ class ToolIntegrationFramework:
                 "Tool config file %s not found, using built-in tools only", self.config_path
             )
         except Exception as e:
-            self.logger.error(f"Error loading tool config: {e}")
+            self.logger.error("Error loading tool config: %s", e)
     
     def _load_external_tool(self, tool_config: Dict[str, Any]):
         """Load an external tool from configuration."""
@@ -128,25 +190,51 @@ class ToolIntegrationFramework:
             class_name = tool_config.get('class')
             
             if module_name and class_name:
-                module = importlib.import_module(module_name)
-                tool_class = getattr(module, class_name)
+                tool_class = _cached_import(module_name, class_name)
                 tool_instance = tool_class(**tool_config.get('init_params', {}))
                 
                 self.register_tool(tool_config['name'], tool_instance)
-                self.logger.info(f"Loaded external tool: {tool_config['name']}")
+                self.logger.info("Loaded external tool: %s", tool_config['name'])
         
         except Exception as e:
-            self.logger.error(f"Failed to load external tool {tool_config.get('name', 'unknown')}: {e}")
+            self.logger.error("Failed to load external tool %s: %s", tool_config.get('name', 'unknown'), e)
     
     def register_tool(self, name: str, tool: BaseTool):
         """Register a tool with the framework."""
         self.tools[name] = tool
         self.tool_definitions[name] = tool.get_definition()
-        self.logger.debug(f"Registered tool: {name}")
+        self._tool_names = tuple(self.tools)
+        self._definitions_view = None
+        self.logger.debug("Registered tool: %s", name)
+    
+    def _refresh_catalog_views(self):
+        """Rebuild the cached catalog views from tool_definitions."""
+        definitions = tuple(self.tool_definitions.values())
+        by_category: Dict[str, List[ToolDefinition]] = {}
+        for definition in definitions:
+            by_category.setdefault(definition.category, []).append(definition)
+        
+        self._definition_dicts_view = tuple(definition.to_dict() for definition in definitions)
+        self._by_category_view = {category: tuple(group) for category, group in by_category.items()}
+        self._definitions_view = definitions
     
     def get_available_tools(self) -> List[ToolDefinition]:
         """Get list of available tools."""
-        return list(self.tool_definitions.values())
+        if self._definitions_view is None:
+            self._refresh_catalog_views()
+        return list(self._definitions_view)
+    
+    def get_available_tool_dicts(self) -> Tuple[Dict[str, Any], ...]:
+        """Get the available tools serialized with to_dict, e.g. for a prompt. Do not modify."""
+        if self._definitions_view is None:
+            self._refresh_catalog_views()
+        return self._definition_dicts_view
+    
+    def get_tools_by_category(self, category: str) -> Tuple[ToolDefinition, ...]:
+        """Get the available tools in one category."""
+        if self._definitions_view is None:
+            self._refresh_catalog_views()
+        return self._by_category_view.get(category, ())
     
     def get_tool_definition(self, name: str) -> Optional[ToolDefinition]:
         """Get definition for a specific tool."""
@@ -158,24 +246,37 @@ class ToolIntegrationFramework:
             return {
                 "success": False,
                 "error": f"Tool '{name}' not found",
-                "available_tools": list(self.tools.keys())
+                "available_tools": self._tool_names
             }
         
         tool = self.tools[name]
+        definition = self.tool_definitions[name]
         
         # Validate parameters
         if not tool.validate_parameters(parameters):
             return {
                 "success": False,
                 "error": f"Invalid parameters for tool '{name}'",
-                "expected_parameters": tool.get_definition().parameters
+                "expected_parameters": definition.parameters
             }
         
+        cache_key = None
+        if definition.cacheable:
+            cache_key = (name, json.dumps(parameters, sort_keys=True, default=str))
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                expires_at, response = cached
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._result_cache.move_to_end(cache_key)
+                    # Callers get their own copy to modify
+                    return copy.deepcopy(response)
+                del self._result_cache[cache_key]
+        
         try:
-            self.logger.info(f"Executing tool: {name}")
+            self.logger.info("Executing tool: %s", name)
             result = await tool.execute(parameters)
             
-            return {
+            response = {
                 "success": True,
                 "tool_name": name,
                 "result": result,
@@ -183,21 +284,118 @@ class ToolIntegrationFramework:
             }
         
         except Exception as e:
-            self.logger.error(f"Error executing tool {name}: {e}")
+            self.logger.error("Error executing tool %s: %s", name, e)
             return {
                 "success": False,
                 "error": str(e),
                 "tool_name": name
             }
+        
+        finally:
+            # Even a failed write may have truncated the file
+            if name == "file_write":
+                self._invalidate_file_reads(parameters.get("file_path", ""))
+        
+        # Tools report their own failures inside the result; only keep real answers
+        failed = isinstance(result, dict) and ("error" in result or result.get("success") is False)
+        if cache_key is not None and not failed:
+            expires_at = None
+            if definition.cache_ttl_s is not None:
+                expires_at = time.monotonic() + definition.cache_ttl_s
+            # Snapshot the envelope so later changes to the caller's dicts don't leak in
+            self._result_cache[cache_key] = (expires_at, copy.deepcopy(response))
+            if len(self._result_cache) > self.result_cache_size:
+                self._result_cache.popitem(last=False)
+        
+        return dict(response)
+    
+    async def execute_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Execute independent tool calls concurrently.
+        
+        Approval is not checked here: as with execute_tool, calls to tools whose
+        definition requires approval must be cleared (e.g. by the safety controller)
+        before they are submitted.
+        
+        Args:
+            calls: (tool name, parameters) pairs
+            
+        Returns:
+            Result envelopes in the same order as calls
+        """
+        results = await asyncio.gather(
+            *(self.execute_tool(name, parameters) for name, parameters in calls),
+            return_exceptions=True
+        )
+        return [
+            {"success": False, "error": str(result), "tool_name": name}
+            if isinstance(result, Exception) else result
+            for (name, _), result in zip(calls, results)
+        ]
+    
+    def submit_tool(self, name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Start a tool call in the background and return a handle to it at once.
+        
+        The caller can carry on (e.g. keep reasoning) and later collect the
+        result with poll_tool or await_tool. Must be called from a running event loop.
+        """
+        handle = uuid.uuid4().hex
+        self._pending[handle] = asyncio.create_task(self.execute_tool(name, parameters))
+        return {"handle": handle, "status": "pending", "tool_name": name}
+    
+    def poll_tool(self, handle: str) -> Dict[str, Any]:
+        """Check a submitted tool call; a finished call's result is returned once."""
+        task = self._pending.get(handle)
+        if task is None:
+            return {"success": False, "error": f"Unknown tool handle '{handle}'"}
+        if not task.done():
+            return {"handle": handle, "status": "pending"}
+        
+        del self._pending[handle]
+        return {"handle": handle, "status": "done", "result": self._task_result(task)}
+    
+    async def await_tool(self, handle: str) -> Dict[str, Any]:
+        """Wait for a submitted tool call and return its result envelope."""
+        task = self._pending.get(handle)
+        if task is None:
+            return {"success": False, "error": f"Unknown tool handle '{handle}'"}
+        
+        await asyncio.wait([task])
+        self._pending.pop(handle, None)
+        return self._task_result(task)
+    
+    @staticmethod
+    def _task_result(task: "asyncio.Task[Dict[str, Any]]") -> Dict[str, Any]:
+        if task.cancelled():
+            return {"success": False, "error": "Tool call was cancelled"}
+        if task.exception() is not None:
+            return {"success": False, "error": str(task.exception())}
+        return task.result()
+    
+    def _invalidate_file_reads(self, file_path: str):
+        """Drop cached file_read results for a file that was just written."""
+        written = os.path.abspath(file_path)
+        stale = [
+            key for key, (_, response) in self._result_cache.items()
+            if key[0] == "file_read"
+            and os.path.abspath(response["parameters_used"].get("file_path", "")) == written
+        ]
+        for key in stale:
+            del self._result_cache[key]
     
     async def cleanup(self):
         """Cleanup resources used by tools."""
+        for task in self._pending.values():
+            task.cancel()
+        self._pending.clear()
+        
         for tool in self.tools.values():
             if hasattr(tool, 'cleanup'):
                 try:
                     await tool.cleanup()
                 except Exception as e:
-                    self.logger.error(f"Error cleaning up tool: {e}")
+                    self.logger.error("Error cleaning up tool: %s", e)
 
 
 # Built-in tool implementations
@@ -228,24 +426,56 @@ class WebSearchTool(BaseTool):
             },
             return_type="object",
             category="information",
-            safety_level="low"
+            safety_level="low",
+            cacheable=True,
+            cache_ttl_s=300.0
         )
 
 
 class FileReadTool(BaseTool):
-    """Tool for reading files."""
+    """Tool for reading files, a page of at most max_bytes at a time."""
+    
+    DEFAULT_MAX_BYTES = 1 << 20
     
     async def execute(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        # Blocking I/O; run it on a worker thread so the event loop stays free
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._execute_blocking, parameters)
+        )
+    
+    def _execute_blocking(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         file_path = parameters.get("file_path", "")
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            max_bytes = int(parameters.get("max_bytes", self.DEFAULT_MAX_BYTES))
+            offset = int(parameters.get("offset", 0))
             
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                file_size = os.fstat(fd).st_size
+                if offset:
+                    os.lseek(fd, offset, os.SEEK_SET)
+                # A single read may return less than asked for, e.g. above 2 GiB on Linux
+                chunks = []
+                remaining = max_bytes
+                while remaining > 0:
+                    chunk = os.read(fd, remaining)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    remaining -= len(chunk)
+            finally:
+                os.close(fd)
+            
+            data = b"".join(chunks)
             return {
                 "file_path": file_path,
-                "content": content,
-                "size": len(content)
+                # A page boundary can split a multi-byte character
+                "content": data.decode("utf-8", errors="replace"),
+                "offset": offset,
+                "bytes_read": len(data),
+                "truncated": offset + len(data) < file_size,
+                "size": file_size
             }
         except Exception as e:
             return {"error": str(e)}
@@ -255,11 +485,16 @@ class FileReadTool(BaseTool):
             name="file_read",
             description="Read content from a file",
             parameters={
-                "file_path": {"type": "string", "description": "Path to the file to read"}
+                "file_path": {"type": "string", "description": "Path to the file to read"},
+                "max_bytes": {"type": "integer", "description": "Maximum number of bytes to read", "default": 1 << 20},
+                "offset": {"type": "integer", "description": "Byte offset to start reading at", "default": 0}
             },
             return_type="object",
             category="file_system",
-            safety_level="medium"
+            safety_level="medium",
+            # Writes through file_write invalidate; the TTL bounds staleness from outside edits
+            cacheable=True,
+            cache_ttl_s=5.0
         )
 
 
@@ -267,6 +502,12 @@ class FileWriteTool(BaseTool):
     """Tool for writing files."""
     
     async def execute(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        # Blocking I/O; run it on a worker thread so the event loop stays free
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._execute_blocking, parameters)
+        )
+    
+    def _execute_blocking(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         file_path = parameters.get("file_path", "")
         content = parameters.get("content", "")
         
@@ -326,6 +567,78 @@ class PythonExecutionTool(BaseTool):
         )
 
 
+_CALCULATOR_FUNCTIONS: Dict[str, Callable] = {
+    "abs": abs, "round": round, "min": min, "max": max,
+    "sum": sum, "pow": pow, "sqrt": lambda x: x**0.5
+}
+_BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod, ast.Pow: operator.pow
+}
+_UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+# Integers wider than this take the event loop hostage for minutes to compute and print
+_MAX_RESULT_BITS = 10000
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_expression(expression: str) -> ast.Expression:
+    return ast.parse(expression.strip(), mode="eval")
+
+
+def _check_power(base: Any, exponent: Any) -> None:
+    """Reject an integer power whose result would exceed _MAX_RESULT_BITS."""
+    if type(base) is int and type(exponent) is int and exponent > 0 and abs(base) > 1:
+        if exponent * math.log2(abs(base)) > _MAX_RESULT_BITS:
+            raise ValueError(f"Result of {base.bit_length()}-bit number ** {exponent} is too large")
+
+
+def _check_product(left: Any, right: Any) -> None:
+    """Reject an integer product whose result would exceed _MAX_RESULT_BITS."""
+    if type(left) is int and type(right) is int and left.bit_length() + right.bit_length() > _MAX_RESULT_BITS + 1:
+        raise ValueError("Result of multiplication is too large")
+
+
+def _evaluate(node: ast.AST) -> Any:
+    """Evaluate an arithmetic expression tree, rejecting anything but numbers, operators and calculator functions."""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float, complex):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if not isinstance(left, (int, float, complex)) or not isinstance(right, (int, float, complex)):
+            # Also keeps list repetition like [0] * 10**9 from exhausting memory
+            raise ValueError("Operators only apply to numbers")
+        if isinstance(node.op, ast.Pow):
+            _check_power(left, right)
+        elif isinstance(node.op, ast.Mult):
+            _check_product(left, right)
+        return _BINARY_OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        return _UNARY_OPERATORS[type(node.op)](_evaluate(node.operand))
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [_evaluate(element) for element in node.elts]
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _CALCULATOR_FUNCTIONS):
+        args = [_evaluate(arg) for arg in node.args]
+        kwargs = {keyword.arg: _evaluate(keyword.value) for keyword in node.keywords if keyword.arg}
+        if len(kwargs) != len(node.keywords):
+            raise ValueError("Argument unpacking is not supported")
+        if node.func.id == "pow":
+            named = {**dict(zip(("base", "exp", "mod"), args)), **kwargs}
+            # Three-argument pow is modular and stays small
+            if named.get("mod") is None:
+                _check_power(named.get("base"), named.get("exp"))
+        elif node.func.id == "round":
+            named = {**dict(zip(("number", "ndigits"), args)), **kwargs}
+            # Rounding an integer to -n digits computes 10 ** n
+            if type(named.get("number")) is int and type(named.get("ndigits")) is int:
+                _check_power(10, -named["ndigits"])
+        return _CALCULATOR_FUNCTIONS[node.func.id](*args, **kwargs)
+    raise ValueError(f"Unsupported expression element: {type(node).__name__}")
+
+
 class CalculatorTool(BaseTool):
     """Tool for mathematical calculations."""
     
@@ -333,11 +646,8 @@ class CalculatorTool(BaseTool):
         expression = parameters.get("expression", "")
         
         try:
-            # Simple evaluation - in production, use a safer math parser
-            result = eval(expression, {"__builtins__": {}}, {
-                "abs": abs, "round": round, "min": min, "max": max,
-                "sum": sum, "pow": pow, "sqrt": lambda x: x**0.5
-            })
+            # Only arithmetic and the calculator functions are evaluated, never arbitrary Python
+            result = _evaluate(_parse_expression(expression))
             
             return {
                 "expression": expression,
@@ -360,7 +670,8 @@ class CalculatorTool(BaseTool):
             },
             return_type="object",
             category="computation",
-            safety_level="low"
+            safety_level="low",
+            cacheable=True
         )
 
 
@@ -368,6 +679,12 @@ class KillProgramTool(BaseTool):
     """Tool for killing the foreground program."""
 
     async def execute(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        # pyautogui blocks on X11/Win32 calls; keep them off the event loop
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._execute_blocking, parameters)
+        )
+
+    def _execute_blocking(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         try:
             if pyautogui is None:
                 return {
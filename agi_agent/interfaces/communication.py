@@ -3,13 +3,29 @@ Communication interface for the AGI Agent.
 Handles natural language processing and user interaction.
 """
 
+import copy
+import hashlib
+import json
 import logging
-from typing import Dict, Any, List, Optional
+import string
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 
+# Optional fast JSON parser for the model's analysis replies
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
 from ..core.reasoning_engine import ReasoningEngine
 
 
+def _loads(data: str) -> Any:
+    """Parse JSON text, with orjson when it is installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
 @dataclass
 class CommunicationContext:
     """Context for communication."""
@@ -30,6 +46,17 @@ class CommunicationInterface:
         
         # Communication templates
         self.response_templates = self._initialize_response_templates()
+        # Templates parsed into (literal, field name) pieces, keyed by the template text so
+        # edits to response_templates take effect; None marks templates left to str.format
+        self._template_parts: Dict[str, Optional[List[Tuple[str, Optional[str]]]]] = {}
+        self._intent_prompt, self._task_info_prompt = self._initialize_analysis_prompts()
+        
+        # Parsed analyses of recent inputs, keyed by SHA-1 of the normalized input;
+        # cleared whenever the user changes
+        self.analysis_cache_size = 256
+        self._intent_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._task_info_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._cached_user_id: Optional[str] = None
         
         self.logger.info("Communication interface initialized")
     
@@ -47,6 +74,53 @@ class CommunicationInterface:
             "learning": "📚 Learning from this experience..."
         }
     
+    @staticmethod
+    def _parse_template(template: str) -> Optional[List[Tuple[str, Optional[str]]]]:
+        """Split a template into (literal, field name) pieces, or None if it needs str.format.
+
+        Only plain named fields are assembled by hand; format specs, conversions
+        and attribute or index lookups keep str.format's full semantics.
+        """
+        parts = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+            if field_name is not None and (format_spec or conversion or not field_name.isidentifier()):
+                return None
+            parts.append((literal, field_name))
+        return parts
+    
+    def _initialize_analysis_prompts(self) -> Tuple[str, str]:
+        """Initialize the prompts for intent analysis and task extraction."""
+        intent_prompt = """
+        Analyze the user's intent from this input:
+        
+        Input: "{user_input}"
+        
+        Determine:
+        1. Primary intent (task_request, question, clarification, feedback, etc.)
+        2. Urgency level (low, medium, high, urgent)
+        3. Task type (creative, analytical, problem_solving, informational, etc.)
+        4. Confidence level (0.0 to 1.0)
+        5. Required capabilities
+        
+        Respond in JSON format.
+        """
+        task_info_prompt = """
+        Extract task information from this request:
+        
+        Request: "{user_input}"
+        Intent: {task_type}
+        
+        Extract:
+        1. Main objective
+        2. Specific requirements
+        3. Constraints or limitations
+        4. Expected deliverables
+        5. Success criteria
+        
+        Respond in JSON format.
+        """
+        return intent_prompt, task_info_prompt
+    
     async def process_user_input(self, user_input: str, context: CommunicationContext = None) -> Dict[str, Any]:
         """
         Process user input and prepare it for the agent.
@@ -61,6 +135,11 @@ class CommunicationInterface:
         if context is None:
             context = CommunicationContext()
         
+        if context.user_id != self._cached_user_id:
+            self._intent_cache.clear()
+            self._task_info_cache.clear()
+            self._cached_user_id = context.user_id
+        
         # Analyze user intent
         intent_analysis = await self._analyze_user_intent(user_input, context)
         
@@ -80,27 +159,19 @@ class CommunicationInterface:
     
     async def _analyze_user_intent(self, user_input: str, context: CommunicationContext) -> Dict[str, Any]:
         """Analyze user intent from input."""
-        prompt = f"""
-        Analyze the user's intent from this input:
-        
-        Input: "{user_input}"
-        
-        Determine:
-        1. Primary intent (task_request, question, clarification, feedback, etc.)
-        2. Urgency level (low, medium, high, urgent)
-        3. Task type (creative, analytical, problem_solving, informational, etc.)
-        4. Confidence level (0.0 to 1.0)
-        5. Required capabilities
+        # Intent doesn't depend on case or surrounding whitespace
+        cache_key = hashlib.sha1(user_input.strip().lower().encode()).digest()
+        cached = self._cached_analysis(self._intent_cache, cache_key)
+        if cached is not None:
+            return cached
         
-        Respond in JSON format.
-        """
+        prompt = self._intent_prompt.format(user_input=user_input)
         
         response = await self.reasoning_engine._query_model(prompt)
         
         try:
-            import json
-            return json.loads(response)
-        except json.JSONDecodeError:
+            return self._cache_analysis(self._intent_cache, cache_key, _loads(response))
+        except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError
             # Fallback analysis
             return {
                 "primary_intent": "task_request",
@@ -115,28 +186,20 @@ class CommunicationInterface:
         if intent_analysis.get("primary_intent") != "task_request":
             return {}
         
-        prompt = f"""
-        Extract task information from this request:
+        task_type = intent_analysis.get("task_type", "general")
+        # Case is kept: extracted objectives and requirements quote the request
+        cache_key = hashlib.sha1(f"{task_type}|{user_input.strip()}".encode()).digest()
+        cached = self._cached_analysis(self._task_info_cache, cache_key)
+        if cached is not None:
+            return cached
         
-        Request: "{user_input}"
-        Intent: {intent_analysis.get("task_type", "general")}
-        
-        Extract:
-        1. Main objective
-        2. Specific requirements
-        3. Constraints or limitations
-        4. Expected deliverables
-        5. Success criteria
-        
-        Respond in JSON format.
-        """
+        prompt = self._task_info_prompt.format(user_input=user_input, task_type=task_type)
         
         response = await self.reasoning_engine._query_model(prompt)
         
         try:
-            import json
-            return json.loads(response)
-        except json.JSONDecodeError:
+            return self._cache_analysis(self._task_info_cache, cache_key, _loads(response))
+        except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError
             return {
                 "main_objective": user_input,
                 "requirements": [],
@@ -145,6 +208,24 @@ class CommunicationInterface:
                 "success_criteria": ["User satisfaction"]
             }
     
+    @staticmethod
+    def _cached_analysis(cache: "OrderedDict[bytes, Dict[str, Any]]", key: bytes) -> Optional[Dict[str, Any]]:
+        analysis = cache.get(key)
+        if analysis is None:
+            return None
+        cache.move_to_end(key)
+        # Callers get their own copy to modify
+        return copy.deepcopy(analysis)
+    
+    def _cache_analysis(self, cache: "OrderedDict[bytes, Dict[str, Any]]", key: bytes,
+                        analysis: Any) -> Any:
+        """Remember a successfully parsed analysis and return it."""
+        if isinstance(analysis, dict):
+            cache[key] = copy.deepcopy(analysis)
+            if len(cache) > self.analysis_cache_size:
+                cache.popitem(last=False)
+        return analysis
+    
     def _prepare_agent_context(self, comm_context: CommunicationContext, 
                              intent_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare context for the agent."""
@@ -166,11 +247,19 @@ class CommunicationInterface:
     def format_response(self, response_type: str, **kwargs) -> str:
         """Format a response using templates."""
         template = self.response_templates.get(response_type, "{message}")
+        if template not in self._template_parts:
+            self._template_parts[template] = self._parse_template(template)
+        parts = self._template_parts[template]
         
         try:
-            return template.format(**kwargs)
+            if parts is None:
+                return template.format_map(kwargs)
+            return "".join([
+                literal if field_name is None else literal + format(kwargs[field_name])
+                for literal, field_name in parts
+            ])
         except KeyError as e:
-            self.logger.warning(f"Missing template parameter: {e}")
+            self.logger.warning("Missing template parameter: %s", e)
             return kwargs.get("message", "Response formatting error")
     
     def format_task_result(self, result: Dict[str, Any]) -> str:
@@ -126,6 +126,10 @@ class ExecutionPlan:
     completed_at: Optional[datetime] = None
     current_step: Optional[str] = None  # Step ID
     
+    # Step IDs grouped into dependency levels: each level depends only on earlier ones,
+    # so its steps can run concurrently. Filled in by the task planner.
+    execution_layers: List[List[str]] = field(default_factory=list)
+    
     def add_step(self, step: PlanStep):
         """Add a step to the plan."""
         step.step_number = len(self.steps) + 1
@@ -182,5 +186,6 @@ class ExecutionPlan:
             "estimated_total_duration": self.estimated_total_duration,
             "actual_total_duration": self.actual_total_duration,
             "steps": [step.to_dict() for step in self.steps],
+            "execution_layers": self.execution_layers,
             "progress": self.get_progress()
         }
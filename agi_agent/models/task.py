@@ -2,11 +2,13 @@
 Task-related data models.
 """
 
+import json
 import uuid
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import cached_property
 
 
 class TaskStatus(Enum):
@@ -55,6 +57,24 @@ class Task:
     estimated_duration: Optional[int] = None  # in minutes
     actual_duration: Optional[int] = None
     
+    # Prompt renderings of requirements/constraints/context, computed on first use
+    @cached_property
+    def requirements_str(self) -> str:
+        return ", ".join(self.requirements) if self.requirements else "None specified"
+    
+    @cached_property
+    def constraints_str(self) -> str:
+        return ", ".join(self.constraints) if self.constraints else "None specified"
+    
+    @cached_property
+    def context_json(self) -> str:
+        return json.dumps(self.context, indent=2) if self.context else "{}"
+    
+    def refresh_prompt_fields(self):
+        """Drop the cached prompt renderings after changing requirements, constraints or context."""
+        for name in ("requirements_str", "constraints_str", "context_json"):
+            self.__dict__.pop(name, None)
+    
     def start(self):
         """Mark task as started."""
         self.status = TaskStatus.IN_PROGRESS
@@ -54,6 +54,9 @@ setup(
             "neo4j>=5.12.0",
             "torch>=2.0.0",
             "transformers>=4.30.0",
+        ],
+        "re2": [
+            "google-re2>=1.1",
         ]
     },
     entry_points={
@@ -146,7 +146,7 @@ def test_installation():
         print("Core libraries imported successfully")
         
         # Test model loading (lightweight test)
-        from model_config import ModelConfig
+        from agi_agent.model_config import ModelConfig
         print("Model configuration loaded")
         
         # Show recommendations
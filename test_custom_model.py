@@ -6,7 +6,7 @@ Shows available models and tests basic functionality.
 import asyncio
 import sys
 import os
-from model_config import ModelConfig
+from agi_agent.model_config import ModelConfig
 from agi_agent.core.custom_model import CustomModelProvider
 
 
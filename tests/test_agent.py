@@ -10,41 +10,46 @@ from agi_agent import AGIAgent, AgentConfig
 from agi_agent.models.task import Task, TaskStatus
 
 
+@pytest.fixture
+def agent_config():
+    """Create test agent configuration."""
+    return AgentConfig(
+        model_provider="openai",
+        model_name="gpt-4",
+        safety_level="medium",
+        learning_enabled=False,  # Disable for testing
+        auto_approve_safe_actions=True
+    )
+
+
+@pytest.fixture
+def mock_agent(agent_config):
+    """Create a mock AGI agent for testing."""
+    with patch('agi_agent.agent.ReasoningEngine') as mock_reasoning, \
+         patch('agi_agent.agent.TaskPlanner') as mock_planner, \
+         patch('agi_agent.agent.KnowledgeManager') as mock_knowledge, \
+         patch('agi_agent.agent.ToolIntegrationFramework') as mock_tools, \
+         patch('agi_agent.agent.LearningSystem') as mock_learning, \
+         patch('agi_agent.agent.SafetyController') as mock_safety, \
+         patch('agi_agent.agent.CommunicationInterface') as mock_comm:
+        
+        agent = AGIAgent(agent_config)
+        
+        # Setup mocks
+        agent.reasoning_engine.understand_request = AsyncMock(return_value={
+            "objective": "test", "requirements": [], "constraints": [],
+            "priority": "medium", "complexity": "simple", "reasoning_types": ["analytical"]
+        })
+        agent.task_planner.create_plan = AsyncMock()
+        agent.safety_controller.check_action = AsyncMock()
+        agent.tool_framework.execute_tool = AsyncMock()
+        
+        return agent
+
+
 class TestAGIAgent:
     """Test cases for the AGI Agent."""
     
-    @pytest.fixture
-    def agent_config(self):
-        """Create test agent configuration."""
-        return AgentConfig(
-            model_provider="openai",
-            model_name="gpt-4",
-            safety_level="medium",
-            learning_enabled=False,  # Disable for testing
-            auto_approve_safe_actions=True
-        )
-    
-    @pytest.fixture
-    def mock_agent(self, agent_config):
-        """Create a mock AGI agent for testing."""
-        with patch('agi_agent.agent.ReasoningEngine') as mock_reasoning, \
-             patch('agi_agent.agent.TaskPlanner') as mock_planner, \
-             patch('agi_agent.agent.KnowledgeManager') as mock_knowledge, \
-             patch('agi_agent.agent.ToolIntegrationFramework') as mock_tools, \
-             patch('agi_agent.agent.LearningSystem') as mock_learning, \
-             patch('agi_agent.agent.SafetyController') as mock_safety, \
-             patch('agi_agent.agent.CommunicationInterface') as mock_comm:
-            
-            agent = AGIAgent(agent_config)
-            
-            # Setup mocks
-            agent.reasoning_engine._query_model = AsyncMock(return_value='{"objective": "test", "requirements": [], "constraints": [], "priority": "medium", "complexity": "simple", "reasoning_types": ["analytical"]}')
-            agent.task_planner.create_plan = AsyncMock()
-            agent.safety_controller.check_action = AsyncMock()
-            agent.tool_framework.execute_tool = AsyncMock()
-            
-            return agent
-    
     @pytest.mark.asyncio
     async def test_agent_initialization(self, agent_config):
         """Test agent initialization."""
@@ -125,6 +130,51 @@ class TestAGIAgent:
         mock_agent.knowledge_manager.close.assert_called_once()
         mock_agent.tool_framework.cleanup.assert_called_once()
     
+    def test_dependency_levels(self):
+        """Test grouping of plan steps into concurrently executable levels."""
+        from agi_agent.models.plan import PlanStep, StepType
+        
+        first = PlanStep(description="First", step_type=StepType.REASONING)
+        second = PlanStep(description="Second", step_type=StepType.REASONING)
+        joined = PlanStep(
+            description="Joined",
+            step_type=StepType.SYNTHESIS,
+            depends_on=[first.id, second.id]
+        )
+        
+        levels = AGIAgent._dependency_levels([joined, first, second])
+        
+        assert levels == [[first, second], [joined]]
+    
+    @pytest.mark.asyncio
+    async def test_execute_plan_waits_for_dependencies(self, mock_agent):
+        """A step never starts before the steps it depends on have finished."""
+        from agi_agent.models.plan import ExecutionPlan, PlanStep, StepType
+        
+        read = PlanStep(description="Read file", step_type=StepType.TOOL_CALL)
+        write = PlanStep(description="Write using its contents", step_type=StepType.TOOL_CALL,
+                         depends_on=[read.id])
+        plan = ExecutionPlan(task_id="test-task", steps=[])
+        plan.add_step(read)
+        plan.add_step(write)
+        
+        events = []
+        
+        async def run_step(step):
+            events.append(("start", step.description))
+            await asyncio.sleep(0.01)
+            events.append(("end", step.description))
+            return {"step_id": step.id}
+        
+        mock_agent._check_and_execute_step = run_step
+        result = await mock_agent._execute_plan(plan)
+        
+        assert events == [
+            ("start", "Read file"), ("end", "Read file"),
+            ("start", "Write using its contents"), ("end", "Write using its contents")
+        ]
+        assert [r["step_id"] for r in result["results"]] == [read.id, write.id]
+    
     def test_agent_config_validation(self):
         """Test agent configuration validation."""
         # Valid config
@@ -0,0 +1,47 @@
+"""
+Tests for the communication interface.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from agi_agent.interfaces.communication import CommunicationInterface
+
+
+@pytest.fixture
+def interface():
+    return CommunicationInterface(Mock())
+
+
+class TestFormatResponse:
+    """Test cases for template-based responses."""
+
+    def test_builtin_template(self, interface):
+        assert interface.format_response("task_failed", error_message="disk full") == \
+            "❌ I encountered an issue: disk full"
+
+    def test_unknown_type_uses_message(self, interface):
+        assert interface.format_response("no_such_type", message="hello") == "hello"
+
+    def test_missing_parameter(self, interface):
+        assert interface.format_response("task_failed") == "Response formatting error"
+
+    def test_edited_template_takes_effect(self, interface):
+        interface.format_response("task_failed", error_message="first")
+        interface.response_templates["task_failed"] = "Failed: {error_message}"
+        interface.response_templates["custom"] = "Custom {value}"
+
+        assert interface.format_response("task_failed", error_message="second") == "Failed: second"
+        assert interface.format_response("custom", value=1) == "Custom 1"
+
+    @pytest.mark.parametrize("template, kwargs", [
+        ("{ratio:.1%} done", {"ratio": 0.25}),
+        ("{name!r}", {"name": "x"}),
+        ("{item.real} / {items[1]}", {"item": 3, "items": ["a", "b"]}),
+        ("{value:>{width}}", {"value": "x", "width": 4}),
+    ])
+    def test_matches_str_format(self, interface, template, kwargs):
+        interface.response_templates["custom"] = template
+
+        assert interface.format_response("custom", **kwargs) == template.format(**kwargs)
@@ -0,0 +1,176 @@
+"""
+Tests for the custom model provider's encoding and cached-conversation paths.
+"""
+
+import logging
+from collections import OrderedDict
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+from agi_agent.core import custom_model
+from agi_agent.core.custom_model import CustomModelProvider
+
+WORDS = ["<pad>", "<eos>"] + [f"w{i}" for i in range(62)]
+
+
+def make_tokenizer():
+    tokenizer_core = tokenizers.Tokenizer(
+        tokenizers.models.WordLevel({word: i for i, word in enumerate(WORDS)}, unk_token="<pad>")
+    )
+    tokenizer_core.pre_tokenizer = tokenizers.pre_tokenizers.WhitespaceSplit()
+    return transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer_core, pad_token="<pad>", eos_token="<eos>", padding_side="left"
+    )
+
+
+def make_model():
+    return transformers.GPT2LMHeadModel(transformers.GPT2Config(
+        vocab_size=len(WORDS), n_positions=512, n_embd=16, n_layer=1, n_head=2,
+        pad_token_id=0, eos_token_id=1
+    )).eval()
+
+
+def make_provider(use_static_cache: bool) -> CustomModelProvider:
+    """A provider around a tiny randomly initialized GPT-2, built without downloads."""
+    # Skip __init__, which would select and download a real model
+    provider = CustomModelProvider.__new__(CustomModelProvider)
+    provider.logger = logging.getLogger(__name__)
+    provider.model_name = "tiny-gpt2"
+    provider.device = "cpu"
+    provider.model = make_model()
+    provider.tokenizer = make_tokenizer()
+    provider.pipeline = None
+    provider._is_fallback = False
+    provider.use_static_cache = use_static_cache
+    provider.max_length = 512
+    provider.temperature = 0.7
+    provider.top_p = 0.9
+    provider.conversation_cache_size = 8
+    provider._conversation_caches = OrderedDict()
+    provider._generation_configs = {}
+    provider._response_cache = OrderedDict()
+    return provider
+
+
+def generation_kwargs(**overrides):
+    kwargs = {"max_length": 512, "max_new_tokens": 4, "temperature": 1.0, "top_p": 1.0, "do_sample": False}
+    kwargs.update(overrides)
+    return kwargs
+
+
+class TestEncode:
+    """Test cases for prompt encoding."""
+
+    def test_static_cache_buckets_prompt_length(self):
+        provider = make_provider(use_static_cache=True)
+
+        inputs, max_new_tokens = provider._encode(["w1 w2 w3"], generation_kwargs())
+
+        assert inputs.input_ids.shape == (1, 64)
+        # Only the real tokens are attended to
+        assert int(inputs.attention_mask.sum()) == 3
+        assert max_new_tokens == 4
+
+    def test_bucketing_can_be_disabled(self):
+        provider = make_provider(use_static_cache=True)
+
+        inputs, _ = provider._encode(["w1 w2 w3"], generation_kwargs(), bucket_lengths=False)
+
+        assert inputs.input_ids.shape == (1, 3)
+
+    def test_long_prompt_keeps_room_for_reply(self):
+        provider = make_provider(use_static_cache=False)
+        prompt = " ".join(f"w{i % 60}" for i in range(600))
+
+        inputs, max_new_tokens = provider._encode([prompt], generation_kwargs(max_new_tokens=12))
+
+        assert inputs.input_ids.shape[-1] == 500
+        assert max_new_tokens == 12
+
+
+class TestConversationCache:
+    """Test cases for multi-turn generation with a persistent cache."""
+
+    def test_history_contains_no_bucket_padding(self):
+        provider = make_provider(use_static_cache=True)
+
+        provider._generate_with_cache("w1 w2 w3", generation_kwargs(), "conversation")
+        _, history_ids = provider._conversation_caches["conversation"]
+        first_turn = history_ids.shape[-1]
+
+        # Three prompt tokens plus at most four generated ones
+        assert 3 < first_turn <= 7
+        assert 0 not in history_ids[0, :3].tolist()
+
+        provider._generate_with_cache("w4 w5", generation_kwargs(), "conversation")
+        _, history_ids = provider._conversation_caches["conversation"]
+
+        assert first_turn + 2 < history_ids.shape[-1] <= first_turn + 2 + 4
+
+    def test_default_reply_budget_keeps_history(self):
+        """Without max_new_tokens the reply is sized to the room the history leaves."""
+        provider = make_provider(use_static_cache=False)
+        kwargs = generation_kwargs(max_new_tokens=None)
+
+        provider._generate_with_cache("w1 w2 w3", kwargs, "conversation")
+        cache, first_ids = provider._conversation_caches["conversation"]
+
+        provider._generate_with_cache("w4 w5", kwargs, "conversation")
+        next_cache, history_ids = provider._conversation_caches["conversation"]
+
+        assert next_cache is cache
+        assert history_ids[0, :first_ids.shape[-1]].tolist() == first_ids[0].tolist()
+        assert history_ids.shape[-1] <= kwargs["max_length"]
+
+    def test_overflowing_history_starts_over(self):
+        provider = make_provider(use_static_cache=False)
+        kwargs = generation_kwargs(max_length=16, max_new_tokens=4)
+        prompt = " ".join(f"w{i}" for i in range(10))
+
+        provider._generate_with_cache(prompt, kwargs, "conversation")
+        cache, _ = provider._conversation_caches["conversation"]
+        provider._generate_with_cache(prompt, kwargs, "conversation")
+        next_cache, history_ids = provider._conversation_caches["conversation"]
+
+        assert next_cache is not cache
+        assert history_ids.shape[-1] <= 16
+
+    def test_least_recent_conversation_is_evicted(self):
+        provider = make_provider(use_static_cache=False)
+        provider.conversation_cache_size = 2
+
+        provider._generate_with_cache("w1", generation_kwargs(), "first")
+        provider._generate_with_cache("w2", generation_kwargs(), "second")
+        provider._generate_with_cache("w3", generation_kwargs(), "first")
+        provider._generate_with_cache("w4", generation_kwargs(), "third")
+
+        assert list(provider._conversation_caches) == ["first", "third"]
+
+
+class TestModelInfo:
+    """Test cases for the reported model mode."""
+
+    def test_full_model(self):
+        assert make_provider(use_static_cache=False).get_model_info()["mode"] == "full"
+
+    def test_fallback_model(self, monkeypatch):
+        provider = make_provider(use_static_cache=False)
+        provider.model = provider.tokenizer = None
+        monkeypatch.setattr(custom_model.AutoTokenizer, "from_pretrained", lambda *args, **kwargs: make_tokenizer())
+        monkeypatch.setattr(provider, "_from_pretrained", lambda *args, **kwargs: make_model())
+
+        provider._initialize_fallback_model()
+
+        assert provider.model is not None
+        assert provider.get_model_info()["mode"] == "fallback"
+
+    def test_simple_generator(self):
+        provider = make_provider(use_static_cache=False)
+        provider.model = provider.tokenizer = None
+        provider.pipeline = provider._simple_pipeline()
+
+        assert provider.get_model_info()["mode"] == "simple"
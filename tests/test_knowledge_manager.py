@@ -0,0 +1,68 @@
+"""
+Tests for the SQLite knowledge store and its JSON migration.
+"""
+
+import json
+
+from agi_agent.core.knowledge_manager import KnowledgeManager
+
+
+def item(item_id, content, created_at="2024-01-01T00:00:00", tags=None):
+    return {
+        "id": item_id, "content": content, "category": "notes", "tags": tags or [],
+        "created_at": created_at, "updated_at": created_at,
+        "confidence": 1.0, "source": "test"
+    }
+
+
+class TestJsonMigration:
+    """Test cases for importing the legacy knowledge.json store."""
+
+    def test_json_and_wal_are_imported(self, tmp_path):
+        (tmp_path / "knowledge.json").write_text(json.dumps({"items": [
+            item("a", "Alpha", tags=["greek"]), item("b", "Beta"), item("c", "Gamma")
+        ]}))
+        (tmp_path / "knowledge.wal").write_text(
+            json.dumps({"op": "put", "item": item("b", "Beta, revised", created_at=1700000000.0)}) + "\n"
+            + json.dumps({"op": "delete", "id": "c"}) + "\n"
+            + json.dumps({"op": "put", "item": item("d", "Delta")}) + "\n"
+            # Partial last line left by a crash mid-append
+            + '{"op": "put", "item": {"id": "e"'
+        )
+
+        manager = KnowledgeManager(base_path=str(tmp_path))
+
+        assert manager.get_knowledge("a").tags == ["greek"]
+        assert manager.get_knowledge("b").content == "Beta, revised"
+        assert manager.get_knowledge("b").created_at == 1700000000.0
+        assert manager.get_knowledge("c") is None
+        assert manager.get_knowledge("d").content == "Delta"
+        assert manager.get_knowledge("e") is None
+        assert manager.get_statistics()["total_items"] == 3
+
+        assert not (tmp_path / "knowledge.json").exists()
+        assert (tmp_path / "knowledge.json.migrated").exists()
+        assert not (tmp_path / "knowledge.wal").exists()
+        manager.db.close()
+
+    def test_migration_runs_once(self, tmp_path):
+        (tmp_path / "knowledge.json").write_text(json.dumps({"items": [item("a", "Alpha")]}))
+        KnowledgeManager(base_path=str(tmp_path)).db.close()
+
+        manager = KnowledgeManager(base_path=str(tmp_path))
+        manager.delete_knowledge("a")
+        manager.db.close()
+
+        # The renamed JSON file is not imported again, so the deletion sticks
+        manager = KnowledgeManager(base_path=str(tmp_path))
+        assert manager.get_knowledge("a") is None
+        manager.db.close()
+
+    def test_unreadable_store_is_left_in_place(self, tmp_path):
+        (tmp_path / "knowledge.json").write_text("{not json")
+
+        manager = KnowledgeManager(base_path=str(tmp_path))
+
+        assert manager.get_statistics()["total_items"] == 0
+        assert (tmp_path / "knowledge.json").exists()
+        manager.db.close()
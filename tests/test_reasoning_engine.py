@@ -0,0 +1,115 @@
+"""
+Tests for the incremental reasoning step parser.
+"""
+
+import asyncio
+
+import pytest
+
+from agi_agent.core.reasoning_engine import ReasoningEngine, ReasoningType, _ReasoningStepParser
+
+RESPONSE = (
+    "Let me think about this.\n"
+    "1. Read the input\n"
+    "   and note its size\n"
+    "2. Pick the approach from:\n"
+    "   1. an option quoted from the input\n"
+    "3. Write the answer\n"
+)
+
+
+def parse(*chunks):
+    parser = _ReasoningStepParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return [step.content for step in parser.close()]
+
+
+class TestReasoningStepParser:
+    """Test cases for the incremental reasoning step parser."""
+
+    def test_numbered_steps(self):
+        assert parse(RESPONSE) == [
+            "1. Read the input and note its size",
+            "2. Pick the approach from: 1. an option quoted from the input",
+            "3. Write the answer",
+        ]
+
+    @pytest.mark.parametrize("split", range(1, len(RESPONSE)))
+    def test_chunking_does_not_change_the_steps(self, split):
+        """A boundary split across two chunks is still found once."""
+        assert parse(RESPONSE[:split], RESPONSE[split:]) == parse(RESPONSE)
+
+    def test_character_stream(self):
+        assert parse(*RESPONSE) == parse(RESPONSE)
+
+    def test_steps_are_emitted_before_close(self):
+        """A step is complete once the next step's line has fully arrived."""
+        parser = _ReasoningStepParser()
+
+        parser.feed("Step 1: look\nStep 2: le")
+        assert parser.steps == []
+
+        parser.feed("ap\nStep 3")
+        assert [step.content for step in parser.steps] == ["Step 1: look"]
+
+        steps = parser.close()
+
+        assert [step.content for step in steps] == ["Step 1: look", "Step 2: leap", "Step 3"]
+        assert [step.step_number for step in steps] == [1, 2, 3]
+
+    def test_bullets(self):
+        assert parse("- first\n* second\n-\n- third") == ["- first", "* second -", "- third"]
+
+    def test_text_without_steps(self):
+        assert parse("Just an answer.\n") == []
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """An engine without a provider client; tests replace its request methods."""
+    monkeypatch.setattr(ReasoningEngine, "_initialize_model", lambda self: None)
+    return ReasoningEngine(model_provider="custom", max_concurrency=1)
+
+
+class TestReasoningEngine:
+    """Test cases for concurrent model requests."""
+
+    def test_batch_larger_than_max_concurrency(self, engine):
+        """Requests queue on the semaphore, in each event loop the engine is used from."""
+        in_flight = []
+
+        async def request_stream(prompt):
+            in_flight.append(prompt)
+            assert len(in_flight) <= engine.max_concurrency
+            await asyncio.sleep(0.01)
+            in_flight.remove(prompt)
+            yield "1. Think\n2. Answer"
+
+        engine._request_completion_stream = request_stream
+        problems = [(f"problem {i}", ReasoningType.CREATIVE) for i in range(3)]
+
+        # The engine is built outside any loop and then used from two separate loops
+        for _ in range(2):
+            chains = asyncio.run(engine.reason_about_problems_batch(problems))
+
+            assert [chain.problem for chain in chains] == [problem for problem, _ in problems]
+            assert all(len(chain.steps) == 2 for chain in chains)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("failure", [
+        "Error: Unable to generate response - out of memory",
+        "Generation error: CUDA error",
+    ])
+    async def test_error_responses_are_not_cached(self, engine, failure):
+        responses = iter([failure, "The answer"])
+
+        async def request(prompt):
+            return next(responses)
+
+        engine._request_completion = request
+
+        assert await engine._query_model("question") == failure
+        assert await engine._query_model("question") == "The answer"
+        # Successful answers are still cached
+        assert await engine._query_model("question") == "The answer"
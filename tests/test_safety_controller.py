@@ -0,0 +1,29 @@
+"""
+Tests for the safety controller.
+"""
+
+import dataclasses
+
+import pytest
+
+from agi_agent.core.safety_controller import SafetyController
+from agi_agent.models.plan import PlanStep, StepType
+
+
+class TestSafetyResult:
+    """Test cases for safety check results."""
+
+    @pytest.mark.asyncio
+    async def test_shared_result_cannot_be_changed(self):
+        controller = SafetyController(level="medium", auto_approve_safe=True)
+        step = PlanStep(description="Summarize the notes", step_type=StepType.REASONING)
+
+        result = await controller.check_action(step)
+        assert result.approved
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            result.approved = False
+        denied = dataclasses.replace(result, approved=False, reason="Denied in review")
+
+        assert not denied.approved
+        assert (await controller.check_action(step)).approved
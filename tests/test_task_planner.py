@@ -0,0 +1,95 @@
+"""
+Tests for the task planner.
+"""
+
+import json
+
+import pytest
+
+from agi_agent.core.task_planner import TaskPlanner
+from agi_agent.models.task import Task
+
+
+class FakeChain:
+    def __init__(self, conclusion: str):
+        self.conclusion = conclusion
+
+    def get_conclusion(self) -> str:
+        return self.conclusion
+
+
+class FakeReasoningEngine:
+    """Answers every planning request with a fixed conclusion."""
+
+    def __init__(self, conclusion: str):
+        self.conclusion = conclusion
+
+    async def reason_about_problem(self, problem, reasoning_type, context=None):
+        return FakeChain(self.conclusion)
+
+    async def _query_model(self, prompt, cacheable=True):
+        return "general"
+
+
+def plan_json(steps):
+    return json.dumps({"plan_description": "Test plan", "steps": steps})
+
+
+class TestTaskPlanner:
+    """Test cases for the task planner."""
+
+    @pytest.mark.asyncio
+    async def test_model_step_ids_are_mapped_to_plan_steps(self):
+        """Dependencies given as the model's ids or numbers become real step dependencies."""
+        planner = TaskPlanner(FakeReasoningEngine(plan_json([
+            {"id": "step_1", "description": "Read the file", "depends_on": []},
+            {"id": "step_2", "description": "Summarize it", "depends_on": ["step_1"]},
+            {"id": "step_3", "description": "Look up a reference", "depends_on": [1]},
+            {"id": "step_4", "description": "Write the report", "depends_on": ["step_2", "3"]}
+        ])))
+
+        plan = await planner.create_plan(Task(description="Summarize a file into a report"))
+        read, summarize, look_up, write = plan.steps
+
+        assert summarize.depends_on == [read.id]
+        assert look_up.depends_on == [read.id]
+        assert write.depends_on == [summarize.id, look_up.id]
+        assert plan.execution_layers == [[read.id], [summarize.id, look_up.id], [write.id]]
+
+    @pytest.mark.asyncio
+    async def test_steps_without_dependencies_run_in_order(self):
+        """Unresolvable or missing dependencies fall back to the previous step."""
+        planner = TaskPlanner(FakeReasoningEngine(plan_json([
+            {"description": "Read the file", "depends_on": []},
+            {"description": "Write using its contents", "depends_on": ["a step that does not exist"]},
+            {"description": "Notify the user"}
+        ])))
+
+        plan = await planner.create_plan(Task(description="Copy a file"))
+
+        assert [len(layer) for layer in plan.execution_layers] == [1, 1, 1]
+        assert [step.depends_on for step in plan.steps] == [[], [plan.steps[0].id], [plan.steps[1].id]]
+
+    @pytest.mark.asyncio
+    async def test_independent_steps_run_together(self):
+        """Only steps marked independent share a layer with the step before them."""
+        planner = TaskPlanner(FakeReasoningEngine(plan_json([
+            {"description": "Search the web", "depends_on": []},
+            {"description": "Read the notes", "depends_on": [], "independent": True},
+            {"description": "Combine", "depends_on": ["1", "2"]}
+        ])))
+
+        plan = await planner.create_plan(Task(description="Research a topic"))
+        search, read, combine = plan.steps
+
+        assert plan.execution_layers == [[search.id, read.id], [combine.id]]
+
+    @pytest.mark.asyncio
+    async def test_fallback_plan_is_sequential(self):
+        """Steps parsed from free text depend on the step before them."""
+        planner = TaskPlanner(FakeReasoningEngine("1. Read the file\n2. Edit it\n3. Save it"))
+
+        plan = await planner.create_plan(Task(description="Edit a file"))
+
+        assert [step.description for step in plan.steps] == ["1. Read the file", "2. Edit it", "3. Save it"]
+        assert plan.execution_layers == [[step.id] for step in plan.steps]
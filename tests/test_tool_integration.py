@@ -0,0 +1,335 @@
+"""
+Tests for the built-in tools and the tool integration framework.
+"""
+
+import asyncio
+import importlib
+import time
+
+import pytest
+
+from agi_agent.core.tool_integration import (
+    BaseTool, CalculatorTool, FileReadTool, ToolDefinition, ToolIntegrationFramework
+)
+
+
+async def calculate(expression: str):
+    return await CalculatorTool().execute({"expression": expression})
+
+
+class TestCalculatorTool:
+    """Test cases for the restricted calculator."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("expression, expected", [
+        ("2 + 3 * 4", 14),
+        ("2 ** 10", 1024),
+        ("pow(2, 10, 7)", 2),
+        ("sqrt(16) + abs(-2)", 6.0),
+        ("max([1, 5, 3]) - min(4, 2)", 3),
+        ("round(1234, -2)", 1200),
+        ("2 ** 9999", 2 ** 9999),
+    ])
+    async def test_arithmetic(self, expression, expected):
+        result = await calculate(expression)
+
+        assert result["success"], result
+        assert result["result"] == expected
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("expression", [
+        "(9 ** 9999) ** 9999",
+        "9 ** 9 ** 9",
+        "2 ** 5000 * 2 ** 5000 * 2 ** 5000",
+        "pow(pow(9, 9999), 9999)",
+        "pow(base=9, exp=99999)",
+        "round(1, -99999999)",
+        "[0] * 10 ** 9",
+    ])
+    async def test_oversized_results_are_rejected_quickly(self, expression):
+        started = time.monotonic()
+
+        result = await calculate(expression)
+
+        assert not result["success"]
+        assert time.monotonic() - started < 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("expression", [
+        "__import__('os').system('true')",
+        "(1).__class__",
+        "open('/etc/passwd')",
+    ])
+    async def test_non_arithmetic_is_rejected(self, expression):
+        result = await calculate(expression)
+
+        assert not result["success"]
+        assert "Unsupported" in result["error"]
+
+
+class TestFileReadTool:
+    """Test cases for paged file reads."""
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_the_whole_file(self, tmp_path):
+        path = tmp_path / "data.txt"
+        path.write_bytes(b"0123456789" * 3)
+        tool = FileReadTool()
+
+        pages = []
+        offset = 0
+        while True:
+            page = await tool.execute({"file_path": str(path), "offset": offset, "max_bytes": 8})
+            pages.append(page)
+            offset += page["bytes_read"]
+            if not page["truncated"]:
+                break
+
+        assert [page["bytes_read"] for page in pages] == [8, 8, 8, 6]
+        assert "".join(page["content"] for page in pages) == "0123456789" * 3
+        assert all(page["size"] == 30 for page in pages)
+
+    @pytest.mark.asyncio
+    async def test_offset_past_end_reads_nothing(self, tmp_path):
+        path = tmp_path / "data.txt"
+        path.write_bytes(b"abc")
+
+        page = await FileReadTool().execute({"file_path": str(path), "offset": 10})
+
+        assert page["content"] == ""
+        assert page["bytes_read"] == 0
+        assert page["truncated"] is False
+
+    @pytest.mark.asyncio
+    async def test_split_multibyte_character_is_replaced(self, tmp_path):
+        path = tmp_path / "data.txt"
+        path.write_text("aé", encoding="utf-8")
+
+        page = await FileReadTool().execute({"file_path": str(path), "max_bytes": 2})
+
+        assert page["content"] == "a�"
+        assert page["truncated"] is True
+
+    @pytest.mark.asyncio
+    async def test_missing_file_reports_error(self, tmp_path):
+        page = await FileReadTool().execute({"file_path": str(tmp_path / "missing.txt")})
+
+        assert "error" in page
+
+
+class CountingTool(BaseTool):
+    """Echoes its parameters and counts how often it actually ran."""
+
+    def __init__(self, cache_ttl_s=None):
+        self.cache_ttl_s = cache_ttl_s
+        self.calls = 0
+
+    async def execute(self, parameters):
+        self.calls += 1
+        if parameters.get("fail"):
+            return {"error": "failed on request"}
+        return {"echo": dict(parameters), "call": self.calls}
+
+    def get_definition(self):
+        return ToolDefinition(
+            name="counting", description="Count calls", parameters={},
+            return_type="object", category="test", safety_level="low",
+            cacheable=True, cache_ttl_s=self.cache_ttl_s
+        )
+
+
+class SleepingTool(BaseTool):
+    """Sleeps for the given delay, then returns its label or raises."""
+
+    async def execute(self, parameters):
+        await asyncio.sleep(parameters.get("delay", 0))
+        if parameters.get("raise"):
+            raise RuntimeError(parameters["raise"])
+        return {"label": parameters.get("label")}
+
+    def get_definition(self):
+        return ToolDefinition(
+            name="sleeping", description="Sleep, then answer", parameters={},
+            return_type="object", category="test", safety_level="low"
+        )
+
+
+@pytest.fixture
+def framework(tmp_path):
+    return ToolIntegrationFramework(config_path=str(tmp_path / "tools.yaml"))
+
+
+class TestResultCache:
+    """Test cases for caching the results of cacheable tools."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_call_is_served_from_cache(self, framework):
+        tool = CountingTool()
+        framework.register_tool("counting", tool)
+
+        first = await framework.execute_tool("counting", {"x": 1})
+        second = await framework.execute_tool("counting", {"x": 1})
+        other = await framework.execute_tool("counting", {"x": 2})
+
+        assert tool.calls == 2
+        assert first == second
+        assert other["result"]["call"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cached_result_is_isolated_from_callers(self, framework):
+        framework.register_tool("counting", CountingTool())
+        parameters = {"x": [1]}
+
+        first = await framework.execute_tool("counting", parameters)
+        first["result"]["echo"]["x"].append("changed")
+        parameters["x"].append("changed")
+        second = await framework.execute_tool("counting", {"x": [1]})
+        second["result"]["call"] = "changed"
+        third = await framework.execute_tool("counting", {"x": [1]})
+
+        assert third["result"] == {"echo": {"x": [1]}, "call": 1}
+        assert third["parameters_used"] == {"x": [1]}
+
+    @pytest.mark.asyncio
+    async def test_expired_result_is_recomputed(self, framework):
+        tool = CountingTool(cache_ttl_s=0.05)
+        framework.register_tool("counting", tool)
+
+        await framework.execute_tool("counting", {})
+        await framework.execute_tool("counting", {})
+        await asyncio.sleep(0.1)
+        result = await framework.execute_tool("counting", {})
+
+        assert tool.calls == 2
+        assert result["result"]["call"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self, framework):
+        tool = CountingTool()
+        framework.register_tool("counting", tool)
+
+        await framework.execute_tool("counting", {"fail": True})
+        await framework.execute_tool("counting", {"fail": True})
+
+        assert tool.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_file_write_invalidates_reads_of_that_file(self, framework, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("old")
+        other = tmp_path / "other.txt"
+        other.write_text("other")
+
+        before = await framework.execute_tool("file_read", {"file_path": str(path)})
+        await framework.execute_tool("file_read", {"file_path": str(other)})
+        await framework.execute_tool("file_write", {"file_path": str(path), "content": "new"})
+        other.write_text("changed outside the agent")
+        after = await framework.execute_tool("file_read", {"file_path": str(path)})
+        other_after = await framework.execute_tool("file_read", {"file_path": str(other)})
+
+        assert before["result"]["content"] == "old"
+        assert after["result"]["content"] == "new"
+        # Reads of other files stay cached until their TTL runs out
+        assert other_after["result"]["content"] == "other"
+
+
+class TestBatchExecution:
+    """Test cases for running independent tool calls concurrently."""
+
+    @pytest.mark.asyncio
+    async def test_results_keep_call_order(self, framework):
+        framework.register_tool("sleeping", SleepingTool())
+
+        results = await framework.execute_tools_batch([
+            ("sleeping", {"delay": 0.05, "label": "slow"}),
+            ("sleeping", {"delay": 0.01, "raise": "broken"}),
+            ("missing", {}),
+            ("sleeping", {"label": "fast"}),
+        ])
+
+        assert [result["success"] for result in results] == [True, False, False, True]
+        assert results[0]["result"] == {"label": "slow"}
+        assert results[1]["error"] == "broken"
+        assert results[2]["error"] == "Tool 'missing' not found"
+        assert results[3]["result"] == {"label": "fast"}
+
+    @pytest.mark.asyncio
+    async def test_calls_overlap(self, framework):
+        framework.register_tool("sleeping", SleepingTool())
+        started = time.monotonic()
+
+        await framework.execute_tools_batch([("sleeping", {"delay": 0.1})] * 5)
+
+        assert time.monotonic() - started < 0.3
+
+    @pytest.mark.asyncio
+    async def test_empty_batch(self, framework):
+        assert await framework.execute_tools_batch([]) == []
+
+
+class TestBackgroundExecution:
+    """Test cases for submitting tool calls behind a handle."""
+
+    @pytest.mark.asyncio
+    async def test_poll_returns_the_result_once(self, framework):
+        framework.register_tool("sleeping", SleepingTool())
+
+        submitted = framework.submit_tool("sleeping", {"delay": 0.05, "label": "done"})
+        handle = submitted["handle"]
+
+        assert submitted["status"] == "pending"
+        assert framework.poll_tool(handle) == {"handle": handle, "status": "pending"}
+
+        await asyncio.sleep(0.1)
+        polled = framework.poll_tool(handle)
+
+        assert polled["status"] == "done"
+        assert polled["result"]["result"] == {"label": "done"}
+        assert framework.poll_tool(handle)["success"] is False
+
+    @pytest.mark.asyncio
+    async def test_await_tool(self, framework):
+        framework.register_tool("sleeping", SleepingTool())
+        handle = framework.submit_tool("sleeping", {"delay": 0.01, "raise": "broken"})["handle"]
+
+        result = await framework.await_tool(handle)
+
+        assert result == {"success": False, "error": "broken", "tool_name": "sleeping"}
+        assert (await framework.await_tool(handle))["error"] == f"Unknown tool handle '{handle}'"
+
+    @pytest.mark.asyncio
+    async def test_unknown_handle(self, framework):
+        assert framework.poll_tool("nope") == {"success": False, "error": "Unknown tool handle 'nope'"}
+        assert await framework.await_tool("nope") == {"success": False, "error": "Unknown tool handle 'nope'"}
+
+    @pytest.mark.asyncio
+    async def test_cleanup_cancels_pending_calls(self, framework):
+        framework.register_tool("sleeping", SleepingTool())
+        handle = framework.submit_tool("sleeping", {"delay": 10})["handle"]
+        task = framework._pending[handle]
+
+        await framework.cleanup()
+        await asyncio.sleep(0)
+
+        assert task.cancelled()
+        assert framework.poll_tool(handle)["success"] is False
+
+
+class TestExternalTools:
+    """Test cases for resolving tool classes named in the config."""
+
+    def test_failed_import_is_retried(self, tmp_path, monkeypatch):
+        from agi_agent.core import tool_integration
+
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(tool_integration, "_import_cache", {})
+
+        with pytest.raises(ImportError):
+            tool_integration._cached_import("late_tool_module", "LateTool")
+
+        (tmp_path / "late_tool_module.py").write_text("class LateTool:\n    pass\n")
+        importlib.invalidate_caches()
+        tool_class = tool_integration._cached_import("late_tool_module", "LateTool")
+
+        assert tool_class.__name__ == "LateTool"
+        assert tool_integration._cached_import("late_tool_module", "LateTool") is tool_class